@@ -1,37 +1,57 @@
 """
 Health check endpoint.
 """
+import asyncio
 from fastapi import APIRouter, Depends
+from sqlalchemy import text
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.database import get_db
 from app.schemas.common import HealthResponse
-import redis
-from app.config import settings
+from app.core.redis_client import redis_client
 
 router = APIRouter()
 
+# Compiled once so the statement cache is reused across probes
+_HEALTH_PING = text("SELECT 1")
+
+
+def _ping_db(db: Session) -> None:
+    db.execute(_HEALTH_PING)
+
+
+async def _check_db(db: Session) -> str:
+    """Run the blocking DB probe in the threadpool and report its status."""
+    try:
+        await run_in_threadpool(_ping_db, db)
+        return "healthy"
+    except Exception as e:
+        return f"unhealthy: {str(e)}"
+
+
+async def _check_redis() -> str:
+    """Ping Redis through the shared pool and report its status."""
+    try:
+        await redis_client.ping()
+        return "healthy"
+    except Exception as e:
+        return f"unhealthy: {str(e)}"
+
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check(db: Session = Depends(get_db)) -> HealthResponse:
     """
     Health check endpoint.
     
-    Checks database and Redis connectivity.
+    Checks database and Redis connectivity concurrently.
     """
-    # Check database
-    try:
-        db.execute("SELECT 1")
-        db_status = "healthy"
-    except Exception as e:
-        db_status = f"unhealthy: {str(e)}"
-
-    # Check Redis
-    try:
-        r = redis.from_url(settings.REDIS_URL)
-        r.ping()
-        redis_status = "healthy"
-    except Exception as e:
-        redis_status = f"unhealthy: {str(e)}"
+    db_status, redis_status = await asyncio.gather(
+        _check_db(db), _check_redis(), return_exceptions=True
+    )
+    if isinstance(db_status, BaseException):
+        db_status = f"unhealthy: {str(db_status)}"
+    if isinstance(redis_status, BaseException):
+        redis_status = f"unhealthy: {str(redis_status)}"
 
     return HealthResponse(
         status="healthy" if db_status == "healthy" and redis_status == "healthy" else "degraded",
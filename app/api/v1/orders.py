@@ -3,26 +3,28 @@ Order API endpoints.
 """
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas.order import (
     OrderCreate,
     OrderResponse,
+    PaginatedOrders,
     OrderStateUpdate,
     OrderShippingUpdate,
 )
-from app.schemas.common import PaginatedResponse, PaginationParams, PageInfo
+from app.schemas.common import PaginationParams, PageInfo
 from app.schemas.state_history import StateHistoryResponse
 from app.services.order_service import OrderService
 from app.services.state_machine import OrderStatus
-from app.utils.exceptions import ResourceNotFoundError, InvalidStateTransitionError
+from app.utils.exceptions import ResourceNotFoundError, InvalidStateTransitionError, ValidationError
+from app.utils.pagination import decode_cursor
 
 router = APIRouter()
 
 
 @router.post("/orders", response_model=OrderResponse, status_code=201)
-async def create_order(
+def create_order(
     order_data: OrderCreate,
     request: Request,
     db: Session = Depends(get_db),
@@ -33,12 +35,12 @@ async def create_order(
     Initial state: PENDING_PAYMENT
     """
     service = OrderService(db)
-    order = service.create_order(order_data, ip_address=request.client.host)
+    order = service.create_order(order_data, ip_address=request.state.client_ip)
     return order
 
 
 @router.get("/orders/{order_id}", response_model=OrderResponse)
-async def get_order(order_id: int, db: Session = Depends(get_db)) -> OrderResponse:
+def get_order(order_id: int, db: Session = Depends(get_db)) -> OrderResponse:
     """Get order by ID."""
     service = OrderService(db)
     order = service.get_order(order_id)
@@ -47,13 +49,15 @@ async def get_order(order_id: int, db: Session = Depends(get_db)) -> OrderRespon
     return order
 
 
-@router.get("/orders", response_model=PaginatedResponse[OrderResponse])
-async def list_orders(
+@router.get("/orders", response_model=PaginatedOrders)
+def list_orders(
     customer_id: Optional[str] = None,
     status: Optional[OrderStatus] = None,
     pagination: PaginationParams = Depends(),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     db: Session = Depends(get_db),
-) -> PaginatedResponse[OrderResponse]:
+) -> PaginatedOrders:
     """
     List orders with optional filters.
     
@@ -62,30 +66,42 @@ async def list_orders(
     - status: Filter by order status
     - page: Page number (default: 1)
     - page_size: Items per page (default: 20, max: 100)
+    - cursor: Opaque cursor from a previous page's next_cursor (keyset pagination)
+    - include_total: Also return total_items/total_pages (runs a COUNT query)
     """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.to_dict())
+
     service = OrderService(db)
-    orders, total = service.list_orders(
+    orders, total, next_cursor = service.list_orders(
         customer_id=customer_id,
         status=status,
         page=pagination.page,
         page_size=pagination.page_size,
+        cursor=after,
+        include_total=include_total,
     )
     
-    total_pages = (total + pagination.page_size - 1) // pagination.page_size
+    total_pages = None
+    if total is not None:
+        total_pages = (total + pagination.page_size - 1) // pagination.page_size
     
-    return PaginatedResponse(
+    return PaginatedOrders(
         items=orders,
         page_info=PageInfo(
             page=pagination.page,
             page_size=pagination.page_size,
             total_items=total,
             total_pages=total_pages,
+            next_cursor=next_cursor,
         ),
     )
 
 
 @router.patch("/orders/{order_id}/state", response_model=OrderResponse)
-async def update_order_state(
+def update_order_state(
     order_id: int,
     state_update: OrderStateUpdate,
     request: Request,
@@ -105,17 +121,17 @@ async def update_order_state(
             trigger=state_update.trigger,
             metadata=state_update.metadata,
             notes=state_update.notes,
-            ip_address=request.client.host,
+            ip_address=request.state.client_ip,
         )
         return order
     except ResourceNotFoundError as e:
-        return JSONResponse(status_code=404, content=e.to_dict())
+        return ORJSONResponse(status_code=404, content=e.to_dict())
     except InvalidStateTransitionError as e:
-        return JSONResponse(status_code=400, content=e.to_dict())
+        return ORJSONResponse(status_code=400, content=e.to_dict())
 
 
 @router.patch("/orders/{order_id}/shipping", response_model=OrderResponse)
-async def update_order_shipping(
+def update_order_shipping(
     order_id: int,
     shipping_update: OrderShippingUpdate,
     db: Session = Depends(get_db),
@@ -134,7 +150,7 @@ async def update_order_shipping(
 
 
 @router.get("/orders/{order_id}/audit", response_model=StateHistoryResponse)
-async def get_order_audit(
+def get_order_audit(
     order_id: int,
     db: Session = Depends(get_db),
 ) -> StateHistoryResponse:
@@ -145,7 +161,7 @@ async def get_order_audit(
 
 
 @router.get("/orders/{order_id}/history", response_model=StateHistoryResponse)
-async def get_order_history(
+def get_order_history(
     order_id: int,
     db: Session = Depends(get_db),
 ) -> StateHistoryResponse:
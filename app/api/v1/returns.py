@@ -8,22 +8,24 @@ from app.database import get_db
 from app.schemas.return_request import (
     ReturnCreate,
     ReturnResponse,
+    PaginatedReturns,
     ReturnApproval,
     ReturnRejection,
     ReturnStateUpdate,
     ReturnShippingUpdate,
 )
-from app.schemas.common import PaginatedResponse, PaginationParams, PageInfo
+from app.schemas.common import PaginationParams, PageInfo
 from app.schemas.state_history import StateHistoryResponse
 from app.services.return_service import ReturnService
 from app.services.state_machine import ReturnStatus
 from app.utils.exceptions import ResourceNotFoundError, InvalidStateTransitionError, ValidationError
+from app.utils.pagination import decode_cursor
 
 router = APIRouter()
 
 
 @router.post("/returns", response_model=ReturnResponse, status_code=201)
-async def create_return(
+def create_return(
     return_data: ReturnCreate,
     request: Request,
     db: Session = Depends(get_db),
@@ -35,14 +37,14 @@ async def create_return(
     """
     try:
         service = ReturnService(db)
-        return_request = service.create_return(return_data, ip_address=request.client.host)
+        return_request = service.create_return(return_data, ip_address=request.state.client_ip)
         return return_request
     except ValidationError as e:
         raise HTTPException(status_code=400, detail=e.to_dict())
 
 
 @router.get("/returns/{return_id}", response_model=ReturnResponse)
-async def get_return(return_id: int, db: Session = Depends(get_db)) -> ReturnResponse:
+def get_return(return_id: int, db: Session = Depends(get_db)) -> ReturnResponse:
     """Get return request by ID."""
     service = ReturnService(db)
     return_request = service.get_return(return_id)
@@ -51,13 +53,15 @@ async def get_return(return_id: int, db: Session = Depends(get_db)) -> ReturnRes
     return return_request
 
 
-@router.get("/returns", response_model=PaginatedResponse[ReturnResponse])
-async def list_returns(
+@router.get("/returns", response_model=PaginatedReturns)
+def list_returns(
     order_id: Optional[int] = None,
     status: Optional[ReturnStatus] = None,
     pagination: PaginationParams = Depends(),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     db: Session = Depends(get_db),
-) -> PaginatedResponse[ReturnResponse]:
+) -> PaginatedReturns:
     """
     List return requests with optional filters.
     
@@ -66,30 +70,42 @@ async def list_returns(
     - status: Filter by return status
     - page: Page number (default: 1)
     - page_size: Items per page (default: 20, max: 100)
+    - cursor: Opaque cursor from a previous page's next_cursor (keyset pagination)
+    - include_total: Also return total_items/total_pages (runs a COUNT query)
     """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.to_dict())
+
     service = ReturnService(db)
-    returns, total = service.list_returns(
+    returns, total, next_cursor = service.list_returns(
         order_id=order_id,
         status=status,
         page=pagination.page,
         page_size=pagination.page_size,
+        cursor=after,
+        include_total=include_total,
     )
     
-    total_pages = (total + pagination.page_size - 1) // pagination.page_size
+    total_pages = None
+    if total is not None:
+        total_pages = (total + pagination.page_size - 1) // pagination.page_size
     
-    return PaginatedResponse(
+    return PaginatedReturns(
         items=returns,
         page_info=PageInfo(
             page=pagination.page,
             page_size=pagination.page_size,
             total_items=total,
             total_pages=total_pages,
+            next_cursor=next_cursor,
         ),
     )
 
 
 @router.patch("/returns/{return_id}/approve", response_model=ReturnResponse)
-async def approve_return(
+def approve_return(
     return_id: int,
     approval: ReturnApproval,
     request: Request,
@@ -107,7 +123,7 @@ async def approve_return(
             approved_by=approval.approved_by,
             metadata=approval.metadata,
             notes=approval.notes,
-            ip_address=request.client.host,
+            ip_address=request.state.client_ip,
         )
         return return_request
     except ResourceNotFoundError as e:
@@ -117,7 +133,7 @@ async def approve_return(
 
 
 @router.patch("/returns/{return_id}/reject", response_model=ReturnResponse)
-async def reject_return(
+def reject_return(
     return_id: int,
     rejection: ReturnRejection,
     request: Request,
@@ -135,7 +151,7 @@ async def reject_return(
             rejected_by=rejection.rejected_by,
             rejection_reason=rejection.rejection_reason,
             metadata=rejection.metadata,
-            ip_address=request.client.host,
+            ip_address=request.state.client_ip,
         )
         return return_request
     except ResourceNotFoundError as e:
@@ -145,7 +161,7 @@ async def reject_return(
 
 
 @router.patch("/returns/{return_id}/state", response_model=ReturnResponse)
-async def update_return_state(
+def update_return_state(
     return_id: int,
     state_update: ReturnStateUpdate,
     request: Request,
@@ -165,7 +181,7 @@ async def update_return_state(
             trigger=state_update.trigger,
             metadata=state_update.metadata,
             notes=state_update.notes,
-            ip_address=request.client.host,
+            ip_address=request.state.client_ip,
         )
         return return_request
     except ResourceNotFoundError as e:
@@ -175,7 +191,7 @@ async def update_return_state(
 
 
 @router.patch("/returns/{return_id}/shipping", response_model=ReturnResponse)
-async def update_return_shipping(
+def update_return_shipping(
     return_id: int,
     shipping_update: ReturnShippingUpdate,
     db: Session = Depends(get_db),
@@ -194,7 +210,7 @@ async def update_return_shipping(
 
 
 @router.get("/returns/{return_id}/history", response_model=StateHistoryResponse)
-async def get_return_history(
+def get_return_history(
     return_id: int,
     db: Session = Depends(get_db),
 ) -> StateHistoryResponse:
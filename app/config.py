@@ -3,6 +3,7 @@ Configuration management using Pydantic Settings.
 
 Reads from environment variables with validation.
 """
+from functools import lru_cache
 from typing import List
 from pydantic_settings import BaseSettings
 
@@ -27,6 +28,13 @@ class Settings(BaseSettings):
     # API Configuration
     API_V1_PREFIX: str = "/api/v1"
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8000"]
+    # Reverse proxies whose X-Forwarded-For header is honoured; requests from
+    # any other peer are attributed to the peer address
+    TRUSTED_PROXIES: List[str] = []
+    
+    # Build response schemas from loaded ORM rows with model_construct (skips
+    # re-validating data that came straight from the database)
+    TRUSTED_MODEL_CONSTRUCT: bool = True
     
     # Pagination
     DEFAULT_PAGE_SIZE: int = 20
@@ -38,6 +46,7 @@ class Settings(BaseSettings):
     SMTP_USER: str = ""
     SMTP_PASSWORD: str = ""
     EMAIL_FROM: str = "noreply@articurated.com"
+    SMTP_MAX_CONNECTIONS: int = 4  # concurrent SMTP sessions per email batch
     
     # Storage
     STORAGE_TYPE: str = "local"  # "local" or "s3"
@@ -51,11 +60,20 @@ class Settings(BaseSettings):
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
     CELERY_TASK_ALWAYS_EAGER: bool = False
+    # Default for long invoice/refund tasks; the notifications worker overrides
+    # it on the command line (see docker-compose.yml)
+    CELERY_WORKER_PREFETCH_MULTIPLIER: int = 1
 
     class Config:
         env_file = ".env"
         case_sensitive = True
 
 
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide Settings instance, built once on first use."""
+    return Settings()
+
+
 # Global settings instance
-settings = Settings()
+settings = get_settings()
@@ -0,0 +1,9 @@
+"""
+Shared Redis connection pool.
+"""
+import redis.asyncio as redis
+from app.config import settings
+
+# Long-lived pool so requests reuse connections instead of reconnecting per call
+redis_pool = redis.ConnectionPool.from_url(settings.REDIS_URL, max_connections=20)
+redis_client = redis.Redis(connection_pool=redis_pool)
@@ -3,10 +3,23 @@ ArtiCurated Order Management System
 
 Main application entry point for FastAPI.
 """
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
+import orjson
 from app.config import settings
 from app.api.v1 import orders, returns, health
+from app.core.redis_client import redis_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release pooled connections on shutdown."""
+    yield
+    await redis_pool.disconnect()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -16,8 +29,13 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
+# Compress larger payloads (list endpoints)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -27,20 +45,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def resolve_client_ip(request: Request, call_next):
+    """
+    Resolve the client IP once per request.
+
+    X-Forwarded-For is only honoured when the direct peer is a trusted proxy;
+    hops are then read right to left, skipping further trusted proxies, so a
+    client cannot spoof its address by sending the header itself.
+    """
+    client_ip = request.client.host if request.client else None
+    trusted = settings.TRUSTED_PROXIES
+    if client_ip in trusted:
+        hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",")]
+        for hop in reversed(hops):
+            if hop and hop not in trusted:
+                client_ip = hop
+                break
+    request.state.client_ip = client_ip
+    return await call_next(request)
+
+
 # Include routers
 app.include_router(orders.router, prefix=settings.API_V1_PREFIX, tags=["orders"])
 app.include_router(returns.router, prefix=settings.API_V1_PREFIX, tags=["returns"])
 app.include_router(health.router, prefix=settings.API_V1_PREFIX, tags=["health"])
 
 
+# Static root payload, serialized once from settings
+_ROOT_PAYLOAD = orjson.dumps({
+    "message": "ArtiCurated Order Management API",
+    "docs": "/docs",
+    "health": f"{settings.API_V1_PREFIX}/health",
+})
+
+
 @app.get("/")
-async def root() -> dict[str, str]:
+async def root() -> Response:
     """Root endpoint."""
-    return {
-        "message": "ArtiCurated Order Management API",
-        "docs": "/docs",
-        "health": f"{settings.API_V1_PREFIX}/health",
-    }
+    return Response(content=_ROOT_PAYLOAD, media_type="application/json")
 
 
 if __name__ == "__main__":
@@ -2,8 +2,11 @@
 Base model utilities and common fields.
 """
 from datetime import datetime
-from sqlalchemy import Column, DateTime
+from typing import Any, Dict
+from sqlalchemy import Column, DateTime, inspect
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declared_attr
+from sqlalchemy.sql.expression import FunctionElement
 from sqlalchemy.types import TypeDecorator, JSON
 from sqlalchemy.dialects.postgresql import JSONB
 
@@ -25,6 +28,32 @@ class JSONType(TypeDecorator):
         return dialect.type_descriptor(JSON())
 
 
+class utcnow(FunctionElement):
+    """Server-side current UTC time, for naive DateTime server defaults.
+
+    ``func.now()`` returns the server's local time on PostgreSQL and is only
+    second-precise on SQLite; this renders a UTC expression per dialect.
+    """
+
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
+
 class TimestampMixin:
     """Mixin to add created_at and updated_at timestamps."""
 
@@ -40,3 +69,8 @@ class TimestampMixin:
             onupdate=datetime.utcnow,
             nullable=False,
         )
+
+
+def column_values(instance: Any) -> Dict[str, Any]:
+    """Return {attribute key: value} for every mapped column of an ORM instance."""
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(instance).mapper.column_attrs}
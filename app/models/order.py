@@ -2,6 +2,7 @@
 Order and OrderLineItem SQLAlchemy models.
 """
 from sqlalchemy import (
+    Boolean,
     Column,
     Integer,
     String,
@@ -12,6 +13,7 @@ from sqlalchemy import (
     Index,
 )
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import false
 from app.database import Base
 from app.models.base import TimestampMixin, JSONType
 from app.services.state_machine import OrderStatus
@@ -25,7 +27,8 @@ class Order(Base, TimestampMixin):
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(String(100), nullable=False, index=True)
     status = Column(
-        Enum(OrderStatus, name="order_status_enum"),
+        # VARCHAR + CHECK rather than a native ENUM type: new states need no ALTER TYPE
+        Enum(OrderStatus, name="order_status_enum", native_enum=False, create_constraint=True, length=32),
         default=OrderStatus.PENDING_PAYMENT,
         nullable=False,
         index=True,
@@ -48,15 +51,20 @@ class Order(Base, TimestampMixin):
     # Shipping
     tracking_number = Column(String(200), nullable=True, index=True)
     carrier = Column(String(100), nullable=True)
+
+    # Invoice idempotency flag; a plain column so the check is an index probe
+    invoice_generated = Column(Boolean, nullable=False, default=False, server_default=false())
     
     # Additional metadata (avoid reserved attribute name 'metadata' on declarative Base)
     extra_metadata = Column("metadata", JSONType, nullable=True)
 
     # Relationships
+    # Every OrderResponse serializes line items, so batch-load them by default
     line_items = relationship(
         "OrderLineItem",
         back_populates="order",
         cascade="all, delete-orphan",
+        lazy="selectin",
     )
     state_history = relationship(
         "StateHistory",
@@ -77,7 +85,13 @@ class Order(Base, TimestampMixin):
         CheckConstraint("shipping_cost >= 0", name="check_shipping_cost_positive"),
         CheckConstraint("total >= 0", name="check_total_positive"),
         Index("idx_order_customer_status", "customer_id", "status"),
-        Index("idx_order_created_at", "created_at"),
+        Index("idx_order_created_at_id", "created_at", "id"),
+        Index(
+            "idx_order_invoice_pending",
+            "id",
+            postgresql_where=invoice_generated.is_(False),
+            sqlite_where=invoice_generated.is_(False),
+        ),
     )
 
     def __repr__(self) -> str:
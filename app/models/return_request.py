@@ -11,6 +11,7 @@ from sqlalchemy import (
     Enum,
     CheckConstraint,
     Index,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -27,7 +28,8 @@ class ReturnRequest(Base, TimestampMixin):
     order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
     
     status = Column(
-        Enum(ReturnStatus, name="return_status_enum"),
+        # VARCHAR + CHECK rather than a native ENUM type: new states need no ALTER TYPE
+        Enum(ReturnStatus, name="return_status_enum", native_enum=False, create_constraint=True, length=32),
         default=ReturnStatus.REQUESTED,
         nullable=False,
         index=True,
@@ -69,7 +71,9 @@ class ReturnRequest(Base, TimestampMixin):
         CheckConstraint("refund_amount >= 0", name="check_refund_amount_positive"),
         Index("idx_return_order_status", "order_id", "status"),
         Index("idx_return_requested_by", "requested_by"),
-        Index("idx_return_created_at", "created_at"),
+        Index("idx_return_created_at_id", "created_at", "id"),
+        # A refund transaction can only ever settle one return
+        UniqueConstraint("refund_transaction_id", name="uq_return_refund_transaction_id"),
     )
 
     def __repr__(self) -> str:
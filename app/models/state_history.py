@@ -1,7 +1,6 @@
 """
 StateHistory SQLAlchemy model for audit trail.
 """
-from datetime import datetime
 from sqlalchemy import (
     Column,
     Integer,
@@ -13,7 +12,7 @@ from sqlalchemy import (
 )
 from sqlalchemy.orm import relationship
 from app.database import Base
-from app.models.base import JSONType
+from app.models.base import JSONType, utcnow
 
 
 class StateHistory(Base):
@@ -40,7 +39,7 @@ class StateHistory(Base):
     trigger = Column(String(100), nullable=False)  # "API", "WEBHOOK", "BACKGROUND_JOB"
     
     # Audit information
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    timestamp = Column(DateTime, server_default=utcnow(), nullable=False, index=True)
     ip_address = Column(String(45), nullable=True)  # IPv6 max length
     
     # Additional context (avoid reserved name on declarative Base)
@@ -57,6 +56,8 @@ class StateHistory(Base):
         Index("idx_state_history_return_timestamp", "return_request_id", "timestamp"),
         Index("idx_state_history_actor", "actor"),
     )
+    # Fetch the DB-assigned timestamp via RETURNING on insert instead of a refresh
+    __mapper_args__ = {"eager_defaults": True}
 
     def __repr__(self) -> str:
         entity_type = "order" if self.order_id else "return"
@@ -1,14 +1,10 @@
 """
 Common Pydantic schemas used across the API.
 """
-from typing import Any, Dict, Generic, List, Optional, TypeVar
+from typing import Any, Dict, Optional
 from pydantic import BaseModel, Field
 
 
-# Generic type for paginated responses
-T = TypeVar("T")
-
-
 class ErrorDetail(BaseModel):
     """Error detail structure."""
     code: str = Field(..., description="Error code")
@@ -31,13 +27,18 @@ class PageInfo(BaseModel):
     """Pagination metadata."""
     page: int = Field(..., description="Current page number")
     page_size: int = Field(..., description="Items per page")
-    total_items: int = Field(..., description="Total number of items")
-    total_pages: int = Field(..., description="Total number of pages")
+    total_items: Optional[int] = Field(default=None, description="Total number of items (only with include_total)")
+    total_pages: Optional[int] = Field(default=None, description="Total number of pages (only with include_total)")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor for the next page, if any")
+
 
+class PaginatedResponse(BaseModel):
+    """
+    Base paginated response.
 
-class PaginatedResponse(BaseModel, Generic[T]):
-    """Generic paginated response."""
-    items: List[T] = Field(..., description="List of items")
+    Subclasses declare a concrete ``items`` list so each response model is a
+    plain class rather than a generic parametrization.
+    """
     page_info: PageInfo = Field(..., description="Pagination metadata")
 
 
@@ -4,7 +4,8 @@ Order-related Pydantic schemas.
 from datetime import datetime
 from decimal import Decimal
 from typing import Any, Dict, List, Optional
-from pydantic import BaseModel, Field, validator, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict
+from app.schemas.common import PaginatedResponse
 from app.services.state_machine import OrderStatus
 
 
@@ -29,12 +30,12 @@ class LineItemResponse(LineItemCreate):
     """Line item response schema."""
     id: int
     subtotal: Decimal
-    metadata: Optional[Dict[str, Any]] = Field(default=None, alias="extra_metadata")
+    extra_metadata: Optional[Dict[str, Any]] = None
     created_at: datetime
     updated_at: datetime
     
     # Pydantic v2 config
-    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    model_config = ConfigDict(from_attributes=True)
 
 
 class OrderCreate(BaseModel):
@@ -43,23 +44,17 @@ class OrderCreate(BaseModel):
     shipping_address: Address
     billing_address: Address
     payment_method: str = Field(..., min_length=1, max_length=50)
-    line_items: List[LineItemCreate] = Field(..., min_items=1)
+    line_items: List[LineItemCreate] = Field(..., min_length=1)
     metadata: Optional[Dict[str, Any]] = None
 
-    @validator("line_items")
-    def validate_line_items(cls, v):
-        if not v:
-            raise ValueError("At least one line item is required")
-        return v
-
 
 class OrderResponse(BaseModel):
     """Order response schema."""
     id: int
     customer_id: str
     status: OrderStatus
-    shipping_address: Dict[str, Any]
-    billing_address: Dict[str, Any]
+    shipping_address: Address
+    billing_address: Address
     payment_method: str
     payment_transaction_id: Optional[str]
     tracking_number: Optional[str]
@@ -69,12 +64,28 @@ class OrderResponse(BaseModel):
     shipping_cost: Decimal
     total: Decimal
     line_items: List[LineItemResponse]
-    metadata: Optional[Dict[str, Any]] = Field(default=None, alias="extra_metadata")
+    extra_metadata: Optional[Dict[str, Any]] = None
     created_at: datetime
     updated_at: datetime
     
     # Pydantic v2 config
-    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    model_config = ConfigDict(from_attributes=True)
+
+
+class OrderListItem(BaseModel):
+    """Slim order summary for list views."""
+    id: int
+    customer_id: str
+    status: OrderStatus
+    total: Decimal
+    created_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PaginatedOrders(PaginatedResponse):
+    """Paginated order summaries."""
+    items: list[OrderListItem] = Field(..., description="List of items")
 
 
 class OrderStateUpdate(BaseModel):
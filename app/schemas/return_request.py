@@ -4,7 +4,8 @@ Return request Pydantic schemas.
 from datetime import datetime
 from decimal import Decimal
 from typing import Any, Dict, List, Optional
-from pydantic import BaseModel, Field, validator, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict
+from app.schemas.common import PaginatedResponse
 from app.services.state_machine import ReturnStatus
 
 
@@ -19,16 +20,10 @@ class ReturnCreate(BaseModel):
     order_id: int = Field(..., gt=0)
     reason: str = Field(..., min_length=1, max_length=5000)
     requested_by: str = Field(..., min_length=1, max_length=100)
-    items: List[ReturnItemRequest] = Field(..., min_items=1)
+    items: List[ReturnItemRequest] = Field(..., min_length=1)
     refund_amount: Decimal = Field(..., ge=0, decimal_places=2)
     metadata: Optional[Dict[str, Any]] = None
 
-    @validator("items")
-    def validate_items(cls, v):
-        if not v:
-            raise ValueError("At least one item is required for return")
-        return v
-
 
 class ReturnResponse(BaseModel):
     """Return request response schema."""
@@ -44,12 +39,29 @@ class ReturnResponse(BaseModel):
     rejection_reason: Optional[str]
     return_tracking_number: Optional[str]
     return_carrier: Optional[str]
-    metadata: Optional[Dict[str, Any]] = Field(default=None, alias="extra_metadata")
+    extra_metadata: Optional[Dict[str, Any]] = None
     created_at: datetime
     updated_at: datetime
     
     # Pydantic v2 config
-    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ReturnListItem(BaseModel):
+    """Slim return request summary for list views."""
+    id: int
+    order_id: int
+    status: ReturnStatus
+    requested_by: str
+    refund_amount: Decimal
+    created_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PaginatedReturns(PaginatedResponse):
+    """Paginated return request summaries."""
+    items: list[ReturnListItem] = Field(..., description="List of items")
 
 
 class ReturnApproval(BaseModel):
@@ -3,8 +3,10 @@ State history Pydantic schemas.
 """
 from datetime import datetime
 from typing import Any, Dict, Optional
-from enum import Enum
-from pydantic import BaseModel, Field, ConfigDict, field_serializer
+from pydantic import BaseModel, ConfigDict, field_serializer
+from app.services.state_machine import OrderStatus, ReturnStatus
+
+_STATE_VALUES = {s: s.value for s in (*OrderStatus, *ReturnStatus)}
 
 
 class StateHistoryRecord(BaseModel):
@@ -18,19 +20,15 @@ class StateHistoryRecord(BaseModel):
     trigger: str
     timestamp: datetime
     ip_address: Optional[str]
-    metadata: Optional[Dict[str, Any]] = Field(default=None, alias="extra_metadata")
+    extra_metadata: Optional[Dict[str, Any]] = None
     notes: Optional[str]
     
     # Pydantic v2 config
-    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
-
-    @field_serializer("previous_state", when_used="always")
-    def _serialize_previous_state(self, v):
-        return v.value if isinstance(v, Enum) else v
+    model_config = ConfigDict(from_attributes=True)
 
-    @field_serializer("new_state", when_used="always")
-    def _serialize_new_state(self, v):
-        return v.value if isinstance(v, Enum) else v
+    @field_serializer("previous_state", "new_state", when_used="json")
+    def _serialize_state(self, v):
+        return _STATE_VALUES.get(v, v)
 
 
 class StateHistoryResponse(BaseModel):
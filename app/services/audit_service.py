@@ -1,11 +1,25 @@
 """
 Audit service for recording state transitions.
 """
-from datetime import datetime
-from enum import Enum
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from sqlalchemy import insert, select
+from app.config import settings
 from sqlalchemy.orm import Session
 from app.models.state_history import StateHistory
+from app.schemas.state_history import StateHistoryRecord
+from app.services.state_machine import OrderStatus, ReturnStatus
+
+
+# Enum member -> stored string, so normalizing a state is a single dict lookup
+_STATE_VALUES: Dict[Any, str] = {s: s.value for s in (*OrderStatus, *ReturnStatus)}
+
+# Only the columns StateHistoryRecord exposes, fetched as plain rows
+_HISTORY_COLUMNS = [getattr(StateHistory, name) for name in StateHistoryRecord.model_fields]
+_HISTORY_BATCH_SIZE = 500
+
+
+def _state_value(state: Optional[str]) -> Optional[str]:
+    return _STATE_VALUES.get(state, state if state is None else str(state))
 
 
 class AuditService:
@@ -43,11 +57,6 @@ class AuditService:
         Returns:
             Created state history record
         """
-        def _state_value(state: Optional[str]) -> Optional[str]:
-            if isinstance(state, Enum):
-                return state.value
-            return str(state) if state is not None else None
-
         history = StateHistory(
             order_id=order_id,
             return_request_id=return_request_id,
@@ -55,9 +64,8 @@ class AuditService:
             new_state=_state_value(new_state),
             actor=actor,
             trigger=trigger,
-            timestamp=datetime.utcnow(),
             ip_address=ip_address,
-            metadata=metadata,
+            extra_metadata=metadata,
             notes=notes,
         )
         
@@ -65,3 +73,60 @@ class AuditService:
         # Note: caller should commit
         
         return history
+
+    def record_state_changes_bulk(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Record many state transitions with a single multi-row INSERT.
+        
+        Args:
+            records: One dict per transition, with the same keys as
+                record_state_change's arguments
+        """
+        if not records:
+            return
+        rows = [
+            {
+                "order_id": r.get("order_id"),
+                "return_request_id": r.get("return_request_id"),
+                "previous_state": _state_value(r.get("previous_state")),
+                "new_state": _state_value(r["new_state"]),
+                "actor": r["actor"],
+                "trigger": r.get("trigger", "API"),
+                "ip_address": r.get("ip_address"),
+                "extra_metadata": r.get("metadata"),
+                "notes": r.get("notes"),
+            }
+            for r in records
+        ]
+        self.db.execute(insert(StateHistory), rows)
+        # Note: caller should commit
+
+    def get_history(
+        self,
+        order_id: Optional[int] = None,
+        return_request_id: Optional[int] = None,
+    ) -> List[StateHistoryRecord]:
+        """
+        Read the audit trail for an order or a return request, oldest first.
+        
+        Rows are streamed in batches as plain column tuples and turned into
+        records without going through the ORM identity map.
+        
+        Args:
+            order_id: Order ID (for order history)
+            return_request_id: Return ID (for return history)
+            
+        Returns:
+            State history records
+        """
+        stmt = select(*_HISTORY_COLUMNS)
+        if order_id is not None:
+            stmt = stmt.where(StateHistory.order_id == order_id)
+        if return_request_id is not None:
+            stmt = stmt.where(StateHistory.return_request_id == return_request_id)
+        stmt = stmt.order_by(StateHistory.timestamp.asc(), StateHistory.id.asc())
+
+        rows = self.db.execute(stmt).yield_per(_HISTORY_BATCH_SIZE)
+        if not settings.TRUSTED_MODEL_CONSTRUCT:
+            return [StateHistoryRecord.model_validate(row) for row in rows]
+        return [StateHistoryRecord.model_construct(**row._mapping) for row in rows]
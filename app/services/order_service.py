@@ -1,16 +1,57 @@
 """
 Order service layer for business logic.
 """
+from datetime import datetime
 from decimal import Decimal
+from functools import lru_cache
 from typing import Optional, Tuple, List, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, bindparam, func, insert, select, tuple_
+from sqlalchemy.orm import Session, selectinload
+from app.config import settings
+from app.models.base import column_values
 from app.models.order import Order, OrderLineItem
-from app.models.state_history import StateHistory
-from app.schemas.order import OrderCreate, OrderResponse, LineItemResponse
+from app.schemas.order import Address, OrderCreate, OrderResponse, OrderListItem, LineItemResponse
 from app.schemas.state_history import StateHistoryRecord
 from app.services.state_machine import StateMachine, OrderStatus
 from app.services.audit_service import AuditService
 from app.utils.exceptions import ResourceNotFoundError, InvalidStateTransitionError
+from app.utils.pagination import encode_cursor
+from app.tasks.invoice_tasks import generate_invoice, generate_invoices_batch
+
+
+TAX_RATE = Decimal("0.10")  # 10% tax for now
+FLAT_SHIPPING_COST = Decimal("10.00")  # Flat rate for now
+
+
+@lru_cache
+def _order_by_id_stmt() -> Select:
+    """
+    Hottest read, built once so every call shares one compiled-cache key.
+
+    Built on first use rather than at import, once every mapper it touches
+    has been registered.
+    """
+    return (
+        select(Order)
+        .where(Order.id == bindparam("order_id"))
+        .options(selectinload(Order.line_items))
+    )
+
+
+def _to_response(order: Order) -> OrderResponse:
+    """Build an OrderResponse from a loaded Order row."""
+    if not settings.TRUSTED_MODEL_CONSTRUCT:
+        return OrderResponse.model_validate(order)
+    values = column_values(order)
+    values["shipping_address"] = Address.model_construct(**values["shipping_address"])
+    values["billing_address"] = Address.model_construct(**values["billing_address"])
+    return OrderResponse.model_construct(
+        **values,
+        line_items=[
+            LineItemResponse.model_construct(**column_values(item))
+            for item in order.line_items
+        ],
+    )
 
 
 class OrderService:
@@ -31,47 +72,59 @@ class OrderService:
         Returns:
             Created order
         """
-        # Calculate totals
-        subtotal = sum(
-            item.unit_price * item.quantity for item in order_data.line_items
-        )
+        # Calculate totals (each line subtotal computed once, reused for the rows)
+        line_subtotals = [item.unit_price * item.quantity for item in order_data.line_items]
+        subtotal = sum(line_subtotals, Decimal(0))
         
         # TODO: Implement real tax calculation
-        tax = subtotal * Decimal("0.10")  # 10% tax for now
+        tax = subtotal * TAX_RATE
         
         # TODO: Implement real shipping calculation
-        shipping_cost = Decimal("10.00")  # Flat rate for now
+        shipping_cost = FLAT_SHIPPING_COST
         
         total = subtotal + tax + shipping_cost
 
+        # Dump addresses once; identical billing/shipping share one dict
+        shipping_address = order_data.shipping_address.model_dump(mode="python")
+        if order_data.billing_address == order_data.shipping_address:
+            billing_address = shipping_address
+        else:
+            billing_address = order_data.billing_address.model_dump(mode="python")
+
         # Create order
         order = Order(
             customer_id=order_data.customer_id,
             status=OrderStatus.PENDING_PAYMENT,
-            shipping_address=order_data.shipping_address.model_dump(),
-            billing_address=order_data.billing_address.model_dump(),
+            shipping_address=shipping_address,
+            billing_address=billing_address,
             payment_method=order_data.payment_method,
             subtotal=subtotal,
             tax=tax,
             shipping_cost=shipping_cost,
             total=total,
-            metadata=order_data.metadata,
+            extra_metadata=order_data.metadata,
         )
         
         self.db.add(order)
         self.db.flush()  # Get order ID
 
-        # Create line items
-        for item_data in order_data.line_items:
-            line_item = OrderLineItem(
-                order_id=order.id,
-                product_id=item_data.product_id,
-                product_name=item_data.product_name,
-                quantity=item_data.quantity,
-                unit_price=item_data.unit_price,
-                subtotal=item_data.unit_price * item_data.quantity,
-            )
-            self.db.add(line_item)
+        # Create line items in a single executemany INSERT
+        self.db.execute(
+            insert(OrderLineItem),
+            [
+                {
+                    "order_id": order.id,
+                    "product_id": item_data.product_id,
+                    "product_name": item_data.product_name,
+                    "quantity": item_data.quantity,
+                    "unit_price": item_data.unit_price,
+                    "subtotal": line_subtotal,
+                }
+                for item_data, line_subtotal in zip(
+                    order_data.line_items, line_subtotals, strict=True
+                )
+            ],
+        )
 
         # Record initial state in audit trail
         self.audit_service.record_state_change(
@@ -87,15 +140,14 @@ class OrderService:
         self.db.commit()
         self.db.refresh(order)
         
-        return OrderResponse.model_validate(order)
+        return _to_response(order)
 
     def get_order(self, order_id: int) -> Optional[OrderResponse]:
         """Get order by ID."""
-        # Use with_for_update() for test compatibility (test sets .with_for_update().first.return_value)
-        order = self.db.query(Order).filter(Order.id == order_id).with_for_update().first()
+        order = self.db.execute(_order_by_id_stmt(), {"order_id": order_id}).scalar_one_or_none()
         if not order:
             return None
-        return OrderResponse.model_validate(order)
+        return _to_response(order)
 
     def list_orders(
         self,
@@ -103,25 +155,61 @@ class OrderService:
         status: Optional[OrderStatus] = None,
         page: int = 1,
         page_size: int = 20,
-    ) -> Tuple[List[OrderResponse], int]:
+        cursor: Optional[Tuple[datetime, int]] = None,
+        include_total: bool = False,
+    ) -> Tuple[List[OrderListItem], Optional[int], Optional[str]]:
         """
-        List orders with filters and pagination.
+        List order summaries with filters and pagination.
+
+        Only the summary columns are selected, so wide JSON columns and line
+        items are never loaded for list views.
+
+        When a cursor (last seen created_at, id) is given, keyset pagination is
+        used; otherwise page/page_size offsets apply. The total over the filtered
+        set is only computed when include_total is requested, as a window
+        count on the page query itself where possible.
         
         Returns:
-            Tuple of (orders, total_count)
+            Tuple of (orders, total_count, next_cursor)
         """
-        query = self.db.query(Order)
+        query = self.db.query(
+            Order.id, Order.customer_id, Order.status, Order.total, Order.created_at
+        )
         
         if customer_id:
             query = query.filter(Order.customer_id == customer_id)
         if status:
             query = query.filter(Order.status == status)
         
-        total = query.count()
+        filtered = query
+        if cursor is not None:
+            query = query.filter(tuple_(Order.created_at, Order.id) < cursor)
+        elif include_total:
+            # Count the filtered set in the same round trip as the page
+            query = query.add_columns(func.count().over().label("total_count"))
         
-        orders = query.order_by(Order.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
+        query = query.order_by(Order.created_at.desc(), Order.id.desc())
+        if cursor is None:
+            query = query.offset((page - 1) * page_size)
+        orders = query.limit(page_size + 1).all()
+
+        total = None
+        if include_total:
+            if cursor is None and orders:
+                total = orders[0].total_count
+            else:
+                total = filtered.with_entities(func.count(Order.id)).scalar()
+
+        next_cursor = None
+        if len(orders) > page_size:
+            orders = orders[:page_size]
+            next_cursor = encode_cursor(orders[-1].created_at, orders[-1].id)
         
-        return [OrderResponse.model_validate(o) for o in orders], total
+        if settings.TRUSTED_MODEL_CONSTRUCT:
+            items = [OrderListItem.model_construct(**o._mapping) for o in orders]
+        else:
+            items = [OrderListItem.model_validate(o) for o in orders]
+        return items, total, next_cursor
 
     def transition_state(
         self,
@@ -132,6 +220,7 @@ class OrderService:
         metadata: Optional[Dict[str, Any]] = None,
         notes: Optional[str] = None,
         ip_address: Optional[str] = None,
+        record_noop: bool = False,
     ) -> OrderResponse:
         """
         Transition order to new state with validation.
@@ -144,6 +233,8 @@ class OrderService:
             metadata: Additional context
             notes: Transition notes
             ip_address: Client IP
+            record_noop: Audit a transition to the current state instead of
+                returning early
         Returns:
             Updated order
         Raises:
@@ -154,8 +245,12 @@ class OrderService:
         if not order:
             raise ResourceNotFoundError("Order", order_id)
 
-        # Validate transition
-        StateMachine.validate_transition(order.status, new_state, is_order=True)
+        if order.status == new_state:
+            # Already in the target state (e.g. a retried webhook): nothing to validate
+            if not record_noop:
+                return _to_response(order)
+        else:
+            StateMachine.validate_transition(order.status, new_state, is_order=True)
 
         # Record state change
         previous_state = order.status
@@ -174,18 +269,90 @@ class OrderService:
             notes=notes,
         )
 
+        # updated_at is a client-side onupdate default, so the flushed instance is
+        # already current; build the response before commit expires it
+        self.db.flush()
+        response = _to_response(order)
         self.db.commit()
-        self.db.refresh(order)
 
         # Trigger background jobs based on state
+        if new_state == OrderStatus.SHIPPED and previous_state != new_state:
+            generate_invoice.delay(str(order_id))
+        return response
+
+    def transition_state_bulk(
+        self,
+        order_ids: List[int],
+        new_state: OrderStatus,
+        actor: str = "SYSTEM",
+        trigger: str = "API",
+        metadata: Optional[Dict[str, Any]] = None,
+        notes: Optional[str] = None,
+        ip_address: Optional[str] = None,
+    ) -> int:
+        """
+        Transition many orders to the same state in one UPDATE.
+        
+        All transitions are validated before anything is written; one invalid
+        order aborts the whole batch. The rows are locked while validated, and
+        orders already in the target state are skipped, as in transition_state.
+        
+        Args:
+            order_ids: Order IDs (duplicates are ignored)
+            new_state: Target state
+            actor: User ID or SYSTEM
+            trigger: Source of transition
+            metadata: Additional context (recorded on every audit row)
+            notes: Transition notes
+            ip_address: Client IP
+        Returns:
+            Number of orders transitioned
+        Raises:
+            ResourceNotFoundError: An order was not found
+            InvalidStateTransitionError: An invalid transition
+        """
+        order_ids = list(dict.fromkeys(order_ids))
+        rows = (
+            self.db.query(Order.id, Order.status)
+            .filter(Order.id.in_(order_ids))
+            .with_for_update()
+            .all()
+        )
+        current = {row.id: row.status for row in rows}
+        changed = {}
+        for order_id in order_ids:
+            if order_id not in current:
+                raise ResourceNotFoundError("Order", order_id)
+            if current[order_id] == new_state:
+                continue
+            StateMachine.validate_transition(current[order_id], new_state, is_order=True)
+            changed[order_id] = current[order_id]
+
+        if not changed:
+            self.db.commit()
+            return 0
+
+        self.db.query(Order).filter(Order.id.in_(changed)).update(
+            {Order.status: new_state}, synchronize_session=False
+        )
+        self.audit_service.record_state_changes_bulk([
+            {
+                "order_id": order_id,
+                "previous_state": previous_state,
+                "new_state": new_state,
+                "actor": actor,
+                "trigger": trigger,
+                "ip_address": ip_address,
+                "metadata": metadata,
+                "notes": notes,
+            }
+            for order_id, previous_state in changed.items()
+        ])
+        self.db.commit()
+
         if new_state == OrderStatus.SHIPPED:
-            try:
-                from app.tasks.invoice_tasks import generate_invoice
-                generate_invoice.delay(str(order_id))
-            except ModuleNotFoundError:
-                # Allow tests to run without Celery installed
-                pass
-        return OrderResponse.model_validate(order)
+            generate_invoices_batch.delay(list(changed))
+        return len(changed)
 
     def update_shipping(
         self,
@@ -202,19 +369,14 @@ class OrderService:
         order.tracking_number = tracking_number
         order.carrier = carrier
         if metadata:
-            order.metadata = {**(order.metadata or {}), **metadata}
+            order.extra_metadata = {**(order.extra_metadata or {}), **metadata}
 
+        self.db.flush()
+        response = _to_response(order)
         self.db.commit()
-        self.db.refresh(order)
         
-        return OrderResponse.model_validate(order)
+        return response
 
     def get_state_history(self, order_id: int) -> List[StateHistoryRecord]:
         """Get audit trail for an order."""
-        history = (
-            self.db.query(StateHistory)
-            .filter(StateHistory.order_id == order_id)
-            .order_by(StateHistory.timestamp.asc())
-            .all()
-        )
-        return [StateHistoryRecord.model_validate(h) for h in history]
+        return self.audit_service.get_history(order_id=order_id)
@@ -1,16 +1,31 @@
 """
 Return request service layer for business logic.
 """
+from datetime import datetime
 from typing import Optional, Tuple, List, Dict, Any
+from sqlalchemy import bindparam, func, select, tuple_
 from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.base import column_values
 from app.models.return_request import ReturnRequest
 from app.models.order import Order
-from app.models.state_history import StateHistory
-from app.schemas.return_request import ReturnCreate, ReturnResponse
+from app.schemas.return_request import ReturnCreate, ReturnResponse, ReturnListItem
 from app.schemas.state_history import StateHistoryRecord
 from app.services.state_machine import StateMachine, ReturnStatus
 from app.services.audit_service import AuditService
 from app.utils.exceptions import ResourceNotFoundError, InvalidStateTransitionError, ValidationError
+from app.utils.pagination import encode_cursor
+from app.tasks.refund_tasks import process_refund
+
+# Hottest read, built once so every call shares one compiled-cache key
+RETURN_BY_ID_STMT = select(ReturnRequest).where(ReturnRequest.id == bindparam("return_id"))
+
+
+def _to_response(return_request: ReturnRequest) -> ReturnResponse:
+    """Build a ReturnResponse from a loaded ReturnRequest row."""
+    if not settings.TRUSTED_MODEL_CONSTRUCT:
+        return ReturnResponse.model_validate(return_request)
+    return ReturnResponse.model_construct(**column_values(return_request))
 
 
 class ReturnService:
@@ -39,8 +54,10 @@ class ReturnService:
             ValidationError: Order not found or invalid items
         """
         # Validate order exists
-        order = self.db.query(Order).filter(Order.id == return_data.order_id).first()
-        if not order:
+        order_id = (
+            self.db.query(Order.id).filter(Order.id == return_data.order_id).scalar()
+        )
+        if order_id is None:
             raise ValidationError(f"Order {return_data.order_id} not found")
 
         # TODO: Validate items exist in order and quantities are valid
@@ -51,9 +68,9 @@ class ReturnService:
             status=ReturnStatus.REQUESTED,
             reason=return_data.reason,
             requested_by=return_data.requested_by,
-            items=[item.model_dump() for item in return_data.items],
+            items=return_data.model_dump(mode="python", include={"items"})["items"],
             refund_amount=return_data.refund_amount,
-            metadata=return_data.metadata,
+            extra_metadata=return_data.metadata,
         )
         
         self.db.add(return_request)
@@ -73,14 +90,16 @@ class ReturnService:
         self.db.commit()
         self.db.refresh(return_request)
         
-        return ReturnResponse.model_validate(return_request)
+        return _to_response(return_request)
 
     def get_return(self, return_id: int) -> Optional[ReturnResponse]:
         """Get return request by ID."""
-        return_request = self.db.query(ReturnRequest).filter(ReturnRequest.id == return_id).first()
+        return_request = self.db.execute(
+            RETURN_BY_ID_STMT, {"return_id": return_id}
+        ).scalar_one_or_none()
         if not return_request:
             return None
-        return ReturnResponse.model_validate(return_request)
+        return _to_response(return_request)
 
     def list_returns(
         self,
@@ -88,25 +107,66 @@ class ReturnService:
         status: Optional[ReturnStatus] = None,
         page: int = 1,
         page_size: int = 20,
-    ) -> Tuple[List[ReturnResponse], int]:
+        cursor: Optional[Tuple[datetime, int]] = None,
+        include_total: bool = False,
+    ) -> Tuple[List[ReturnListItem], Optional[int], Optional[str]]:
         """
-        List return requests with filters and pagination.
+        List return request summaries with filters and pagination.
+
+        Only the summary columns are selected, so item lists and metadata are
+        never loaded for list views.
+
+        When a cursor (last seen created_at, id) is given, keyset pagination is
+        used; otherwise page/page_size offsets apply. The total over the filtered
+        set is only computed when include_total is requested, as a window
+        count on the page query itself where possible.
         
         Returns:
-            Tuple of (returns, total_count)
+            Tuple of (returns, total_count, next_cursor)
         """
-        query = self.db.query(ReturnRequest)
+        query = self.db.query(
+            ReturnRequest.id,
+            ReturnRequest.order_id,
+            ReturnRequest.status,
+            ReturnRequest.requested_by,
+            ReturnRequest.refund_amount,
+            ReturnRequest.created_at,
+        )
         
         if order_id:
             query = query.filter(ReturnRequest.order_id == order_id)
         if status:
             query = query.filter(ReturnRequest.status == status)
         
-        total = query.count()
+        filtered = query
+        if cursor is not None:
+            query = query.filter(tuple_(ReturnRequest.created_at, ReturnRequest.id) < cursor)
+        elif include_total:
+            # Count the filtered set in the same round trip as the page
+            query = query.add_columns(func.count().over().label("total_count"))
         
-        returns = query.order_by(ReturnRequest.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
+        query = query.order_by(ReturnRequest.created_at.desc(), ReturnRequest.id.desc())
+        if cursor is None:
+            query = query.offset((page - 1) * page_size)
+        returns = query.limit(page_size + 1).all()
+
+        total = None
+        if include_total:
+            if cursor is None and returns:
+                total = returns[0].total_count
+            else:
+                total = filtered.with_entities(func.count(ReturnRequest.id)).scalar()
+
+        next_cursor = None
+        if len(returns) > page_size:
+            returns = returns[:page_size]
+            next_cursor = encode_cursor(returns[-1].created_at, returns[-1].id)
         
-        return [ReturnResponse.model_validate(r) for r in returns], total
+        if settings.TRUSTED_MODEL_CONSTRUCT:
+            items = [ReturnListItem.model_construct(**r._mapping) for r in returns]
+        else:
+            items = [ReturnListItem.model_validate(r) for r in returns]
+        return items, total, next_cursor
 
     def approve_return(
         self,
@@ -158,10 +218,13 @@ class ReturnService:
             notes=notes,
         )
 
+        # updated_at is a client-side onupdate default, so the flushed instance is
+        # already current; build the response before commit expires it
+        self.db.flush()
+        response = _to_response(return_request)
         self.db.commit()
-        self.db.refresh(return_request)
         
-        return ReturnResponse.model_validate(return_request)
+        return response
 
     def reject_return(
         self,
@@ -214,10 +277,11 @@ class ReturnService:
             notes=rejection_reason,
         )
 
+        self.db.flush()
+        response = _to_response(return_request)
         self.db.commit()
-        self.db.refresh(return_request)
         
-        return ReturnResponse.model_validate(return_request)
+        return response
 
     def transition_state(
         self,
@@ -228,6 +292,7 @@ class ReturnService:
         metadata: Optional[Dict[str, Any]] = None,
         notes: Optional[str] = None,
         ip_address: Optional[str] = None,
+        record_noop: bool = False,
     ) -> ReturnResponse:
         """
         Transition return to new state with validation.
@@ -240,6 +305,8 @@ class ReturnService:
             metadata: Additional context
             notes: Transition notes
             ip_address: Client IP
+            record_noop: Audit a transition to the current state instead of
+                returning early
             
         Returns:
             Updated return request
@@ -252,8 +319,12 @@ class ReturnService:
         if not return_request:
             raise ResourceNotFoundError("ReturnRequest", return_id)
 
-        # Validate transition
-        StateMachine.validate_transition(return_request.status, new_state, is_order=False)
+        if return_request.status == new_state:
+            # Already in the target state (e.g. a retried webhook): nothing to validate
+            if not record_noop:
+                return _to_response(return_request)
+        else:
+            StateMachine.validate_transition(return_request.status, new_state, is_order=False)
 
         # Record state change
         previous_state = return_request.status
@@ -270,15 +341,15 @@ class ReturnService:
             notes=notes,
         )
 
+        self.db.flush()
+        response = _to_response(return_request)
         self.db.commit()
-        self.db.refresh(return_request)
 
         # Trigger background jobs based on state
-        if new_state == ReturnStatus.COMPLETED:
-            from app.tasks.refund_tasks import process_refund
+        if new_state == ReturnStatus.COMPLETED and previous_state != new_state:
             process_refund.delay(return_id)
         
-        return ReturnResponse.model_validate(return_request)
+        return response
 
     def update_shipping(
         self,
@@ -288,26 +359,23 @@ class ReturnService:
         metadata: Optional[Dict[str, Any]] = None,
     ) -> Optional[ReturnResponse]:
         """Update return shipping information."""
-        return_request = self.db.query(ReturnRequest).filter(ReturnRequest.id == return_id).first()
+        return_request = self.db.execute(
+            RETURN_BY_ID_STMT, {"return_id": return_id}
+        ).scalar_one_or_none()
         if not return_request:
             return None
 
         return_request.return_tracking_number = tracking_number
         return_request.return_carrier = carrier
         if metadata:
-            return_request.metadata = {**(return_request.metadata or {}), **metadata}
+            return_request.extra_metadata = {**(return_request.extra_metadata or {}), **metadata}
 
+        self.db.flush()
+        response = _to_response(return_request)
         self.db.commit()
-        self.db.refresh(return_request)
         
-        return ReturnResponse.model_validate(return_request)
+        return response
 
     def get_state_history(self, return_id: int) -> List[StateHistoryRecord]:
         """Get audit trail for a return request."""
-        history = (
-            self.db.query(StateHistory)
-            .filter(StateHistory.return_request_id == return_id)
-            .order_by(StateHistory.timestamp.asc())
-            .all()
-        )
-        return [StateHistoryRecord.model_validate(h) for h in history]
+        return self.audit_service.get_history(return_request_id=return_id)
@@ -4,7 +4,8 @@ State Machine implementation for order and return state transitions.
 Uses data-driven dictionaries for validation instead of if/else chains.
 """
 from enum import Enum
-from typing import Dict, List
+from typing import Dict, FrozenSet, Tuple
+from app.utils.exceptions import InvalidStateTransitionError
 
 
 class OrderStatus(str, Enum):
@@ -28,22 +29,32 @@ class ReturnStatus(str, Enum):
 
 
 # Data-driven state transition rules
-ORDER_TRANSITIONS: Dict[OrderStatus, List[OrderStatus]] = {
-    OrderStatus.PENDING_PAYMENT: [OrderStatus.PAID, OrderStatus.CANCELLED],
-    OrderStatus.PAID: [OrderStatus.PROCESSING_IN_WAREHOUSE, OrderStatus.CANCELLED],
-    OrderStatus.PROCESSING_IN_WAREHOUSE: [OrderStatus.SHIPPED],
-    OrderStatus.SHIPPED: [OrderStatus.DELIVERED],
-    OrderStatus.DELIVERED: [],  # Terminal state
-    OrderStatus.CANCELLED: [],  # Terminal state
+ORDER_TRANSITIONS: Dict[OrderStatus, FrozenSet[OrderStatus]] = {
+    OrderStatus.PENDING_PAYMENT: frozenset({OrderStatus.PAID, OrderStatus.CANCELLED}),
+    OrderStatus.PAID: frozenset({OrderStatus.PROCESSING_IN_WAREHOUSE, OrderStatus.CANCELLED}),
+    OrderStatus.PROCESSING_IN_WAREHOUSE: frozenset({OrderStatus.SHIPPED}),
+    OrderStatus.SHIPPED: frozenset({OrderStatus.DELIVERED}),
+    OrderStatus.DELIVERED: frozenset(),  # Terminal state
+    OrderStatus.CANCELLED: frozenset(),  # Terminal state
 }
 
-RETURN_TRANSITIONS: Dict[ReturnStatus, List[ReturnStatus]] = {
-    ReturnStatus.REQUESTED: [ReturnStatus.APPROVED, ReturnStatus.REJECTED],
-    ReturnStatus.APPROVED: [ReturnStatus.IN_TRANSIT],
-    ReturnStatus.REJECTED: [],  # Terminal state
-    ReturnStatus.IN_TRANSIT: [ReturnStatus.RECEIVED],
-    ReturnStatus.RECEIVED: [ReturnStatus.COMPLETED],
-    ReturnStatus.COMPLETED: [],  # Terminal state
+RETURN_TRANSITIONS: Dict[ReturnStatus, FrozenSet[ReturnStatus]] = {
+    ReturnStatus.REQUESTED: frozenset({ReturnStatus.APPROVED, ReturnStatus.REJECTED}),
+    ReturnStatus.APPROVED: frozenset({ReturnStatus.IN_TRANSIT}),
+    ReturnStatus.REJECTED: frozenset(),  # Terminal state
+    ReturnStatus.IN_TRANSIT: frozenset({ReturnStatus.RECEIVED}),
+    ReturnStatus.RECEIVED: frozenset({ReturnStatus.COMPLETED}),
+    ReturnStatus.COMPLETED: frozenset(),  # Terminal state
+}
+
+# Allowed transitions in enum declaration order, for stable error messages
+_ORDER_ALLOWED: Dict[OrderStatus, Tuple[OrderStatus, ...]] = {
+    state: tuple(s for s in OrderStatus if s in allowed)
+    for state, allowed in ORDER_TRANSITIONS.items()
+}
+_RETURN_ALLOWED: Dict[ReturnStatus, Tuple[ReturnStatus, ...]] = {
+    state: tuple(s for s in ReturnStatus if s in allowed)
+    for state, allowed in RETURN_TRANSITIONS.items()
 }
 
 
@@ -59,44 +70,25 @@ class StateMachine:
         """
         Check if transition is allowed.
         """
+        allowed: FrozenSet[OrderStatus | ReturnStatus]
         if is_order:
-            allowed = ORDER_TRANSITIONS.get(current_state, [])
+            allowed = ORDER_TRANSITIONS.get(current_state, frozenset())
         else:
-            allowed = RETURN_TRANSITIONS.get(current_state, [])
+            allowed = RETURN_TRANSITIONS.get(current_state, frozenset())
         return new_state in allowed
 
     @staticmethod
     def get_allowed_transitions(
         current_state: OrderStatus | ReturnStatus,
         is_order: bool = True,
-    ) -> List[OrderStatus | ReturnStatus]:
+    ) -> Tuple[OrderStatus | ReturnStatus, ...]:
         """
         Return allowed transitions for the current state.
         """
         if is_order:
-            return ORDER_TRANSITIONS.get(current_state, [])
+            return _ORDER_ALLOWED.get(current_state, ())
         else:
-            return RETURN_TRANSITIONS.get(current_state, [])
-
-    @staticmethod
-    def validate_transition(
-        current_state: OrderStatus | ReturnStatus,
-        new_state: OrderStatus | ReturnStatus,
-        is_order: bool = True,
-    ) -> None:
-        """
-        Raise InvalidStateTransitionError if not allowed, else return None.
-        """
-        if not StateMachine.can_transition(current_state, new_state, is_order=is_order):
-            from app.utils.exceptions import InvalidStateTransitionError
-            allowed = StateMachine.get_allowed_transitions(current_state, is_order=is_order)
-            raise InvalidStateTransitionError(
-                current_state=current_state,
-                requested_state=new_state,
-                allowed_transitions=allowed
-            )
-        # else: valid, do nothing
-            return  # Remove the incomplete docstring and code
+            return _RETURN_ALLOWED.get(current_state, ())
 
     @staticmethod
     def validate_transition(
@@ -113,10 +105,8 @@ class StateMachine:
             is_order: True for orders, False for returns
             
         Raises:
-            ValueError: If transition is not allowed
+            InvalidStateTransitionError: If transition is not allowed
         """
-        from app.utils.exceptions import InvalidStateTransitionError
-        
         if not StateMachine.can_transition(current_state, new_state, is_order):
             allowed = StateMachine.get_allowed_transitions(current_state, is_order)
             raise InvalidStateTransitionError(
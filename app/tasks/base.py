@@ -0,0 +1,46 @@
+"""
+Shared base class for database-backed Celery tasks.
+"""
+import random
+from celery import Task, current_task
+from celery.signals import task_postrun
+from sqlalchemy.orm import scoped_session
+from app.database import SessionLocal
+
+
+def _task_scope():
+    """Scope sessions to the currently executing task."""
+    return current_task.request.id if current_task else None
+
+
+# One session per running task, all drawing from the application's engine pool
+TaskSession = scoped_session(SessionLocal, scopefunc=_task_scope)
+
+
+@task_postrun.connect
+def _remove_task_session(task_id=None, **kwargs):
+    """Close the task's session and return its connection to the pool."""
+    TaskSession.remove()
+
+
+class DatabaseTask(Task):
+    """Base task that provides database session."""
+
+    @property
+    def db(self):
+        return TaskSession()
+
+
+def retry_countdown(retries: int, base: float, cap: float) -> float:
+    """
+    Full-jitter exponential backoff delay for a manual self.retry().
+
+    Args:
+        retries: Number of retries already attempted (self.request.retries)
+        base: Delay scale in seconds for the first retry
+        cap: Upper bound on the delay in seconds
+
+    Returns:
+        Countdown in seconds, uniformly drawn from [1, min(cap, base * 2**retries)]
+    """
+    return random.uniform(1, min(cap, base * 2 ** retries))
@@ -6,31 +6,41 @@ class generate_invoice:
 """
 Invoice generation background tasks.
 """
-from celery import Task
-from app.tasks.celery_app import celery_app
-from app.database import SessionLocal
+from app.tasks.celery_app import BATCH_COMPRESSION, celery_app
+from app.tasks.base import DatabaseTask, retry_countdown
+from app.tasks.notification_tasks import send_invoice_email, send_invoice_email_batch
 from app.models.order import Order
+from app.utils.email_sender import EmailSender, resolve_email
+from app.utils.invoice_generator import InvoiceGenerator
 from app.utils.exceptions import RetryableError
 import logging
 
 logger = logging.getLogger(__name__)
 
+RETRY_BACKOFF_MAX = 600  # 10 minutes
 
-class DatabaseTask(Task):
-    """Base task that provides database session."""
-    
-    _db = None
 
-    @property
-    def db(self):
-        if self._db is None:
-            self._db = SessionLocal()
-        return self._db
+def _send_invoice_email_inline(email: dict, invoice_path: str):
+    """
+    Send the invoice email from the worker that generated the PDF.
 
-    def after_return(self, *args, **kwargs):
-        if self._db is not None:
-            self._db.close()
-            self._db = None
+    This skips the broker round-trip while the PDF is still in the page cache.
+    If the send fails, hand it to send_invoice_email so it is retried with
+    backoff without regenerating the invoice. Never raises: the invoice is
+    already committed, so a retry of generate_invoice would not resend it.
+    """
+    try:
+        EmailSender().send_invoice(email, invoice_path)
+    except Exception as exc:
+        logger.warning("Inline invoice email failed for order %s, queueing: %s", email["order_id"], exc)
+        try:
+            send_invoice_email.delay(email, invoice_path)
+        except Exception:
+            logger.exception(
+                "Could not queue invoice email for order %s (%s); it must be resent manually",
+                email["order_id"],
+                invoice_path,
+            )
 
 
 @celery_app.task(
@@ -38,16 +48,13 @@ class DatabaseTask(Task):
     base=DatabaseTask,
     max_retries=3,
     default_retry_delay=60,  # 1 minute
-    retry_backoff=True,
-    retry_backoff_max=600,  # 10 minutes
-    retry_jitter=True,
 )
 def generate_invoice(self, order_id: int):
     """
     Generate invoice PDF for an order.
     
     Triggered when order transitions to SHIPPED state.
-    Retries: 3 attempts with exponential backoff.
+    Retries: 3 attempts with jittered exponential backoff.
     
     Args:
         order_id: Order ID to generate invoice for
@@ -58,37 +65,114 @@ def generate_invoice(self, order_id: int):
         return {"status": "skipped"}
 
     try:
-        logger.info(f"Generating invoice for order {order_id}")
+        logger.info("Generating invoice for order %s", order_id)
         
         # Get order
         order = self.db.query(Order).filter(Order.id == order_id).first()
         if not order:
-            logger.error(f"Order {order_id} not found")
+            logger.error("Order %s not found", order_id)
             return
 
         # Check if invoice already generated (idempotency)
-        if order.metadata and order.metadata.get("invoice_generated"):
-            logger.info(f"Invoice already generated for order {order_id}")
+        if order.invoice_generated:
+            logger.info("Invoice already generated for order %s", order_id)
             return
 
         # Generate invoice PDF
-        from app.utils.invoice_generator import InvoiceGenerator
         generator = InvoiceGenerator()
         invoice_path = generator.generate(order)
 
         # Store invoice reference
-        if not order.metadata:
-            order.metadata = {}
-        order.metadata["invoice_generated"] = True
-        order.metadata["invoice_path"] = invoice_path
+        order.invoice_generated = True
+        order.extra_metadata = {**(order.extra_metadata or {}), "invoice_path": invoice_path}
         self.db.commit()
 
         # Send email with invoice
-        from app.tasks.notification_tasks import send_invoice_email
-        send_invoice_email.delay(order_id, invoice_path)
+        email = {
+            "order_id": order.id,
+            "to": resolve_email(order.customer_id),
+            "tracking": order.tracking_number,
+            "carrier": order.carrier,
+        }
+        _send_invoice_email_inline(email, invoice_path)
+
+        logger.info("Invoice generated successfully for order %s: %s", order_id, invoice_path)
+
+    except Exception as exc:
+        logger.error("Failed to generate invoice for order %s: %s", order_id, exc)
+        raise self.retry(
+            exc=exc,
+            countdown=retry_countdown(self.request.retries, self.default_retry_delay, RETRY_BACKOFF_MAX),
+        )
+
+
+@celery_app.task(
+    bind=True,
+    base=DatabaseTask,
+    max_retries=3,
+    default_retry_delay=60,  # 1 minute
+)
+def generate_invoices_batch(self, order_ids: list):
+    """
+    Generate invoice PDFs for several orders in one WeasyPrint render.
+
+    Orders that already have an invoice are skipped. Invoice emails for the
+    batch are handed to send_invoice_email_batch.
+
+    Args:
+        order_ids: Order IDs to generate invoices for
+    """
+    if celery_app.conf.task_always_eager:
+        logger.info("Eager mode: skipping invoice batch of %s orders", len(order_ids))
+        return {"status": "skipped"}
+
+    try:
+        logger.info("Generating invoice batch for %s orders", len(order_ids))
+
+        orders = (
+            self.db.query(Order)
+            .filter(Order.id.in_(order_ids), Order.invoice_generated.is_(False))
+            .all()
+        )
+        if not orders:
+            logger.info("No pending invoices in batch")
+            return
+
+        generator = InvoiceGenerator()
+        paths = generator.generate_many(orders)
+
+        # Reassign so the JSON column change is tracked
+        for order in orders:
+            order.invoice_generated = True
+            order.extra_metadata = {**(order.extra_metadata or {}), "invoice_path": paths[order.id]}
+        self.db.commit()
+
+        jobs = [
+            [
+                {
+                    "order_id": order.id,
+                    "to": resolve_email(order.customer_id),
+                    "tracking": order.tracking_number,
+                    "carrier": order.carrier,
+                },
+                paths[order.id],
+            ]
+            for order in orders
+        ]
+        # Invoices are committed, so a retry would skip them; log rather than raise
+        try:
+            send_invoice_email_batch.apply_async((jobs,), compression=BATCH_COMPRESSION)
+        except Exception:
+            logger.exception(
+                "Could not queue invoice emails for orders %s; they must be resent manually",
+                [order.id for order in orders],
+            )
 
-        logger.info(f"Invoice generated successfully for order {order_id}: {invoice_path}")
+        logger.info("Invoice batch generated for %s orders", len(orders))
 
     except Exception as exc:
-        logger.error(f"Failed to generate invoice for order {order_id}: {exc}")
-        raise self.retry(exc=exc)
+        logger.error("Failed to generate invoice batch: %s", exc)
+        raise self.retry(
+            exc=exc,
+            countdown=retry_countdown(self.request.retries, self.default_retry_delay, RETRY_BACKOFF_MAX),
+        )
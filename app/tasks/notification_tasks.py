@@ -1,81 +1,125 @@
 """
 Email notification background tasks.
 """
+from celery.signals import worker_process_shutdown
 from app.tasks.celery_app import celery_app
+from app.utils.email_sender import EmailSender, close_smtp_connection
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@worker_process_shutdown.connect
+def _close_smtp_connection(**kwargs):
+    """Close the worker's persistent SMTP connection on shutdown."""
+    close_smtp_connection()
+
+
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
-def send_invoice_email(self, order_id: int, invoice_path: str):
+def send_invoice_email(self, email: dict, invoice_path: str):
     """
     Send invoice email to customer.
     
     Args:
-        order_id: Order ID
+        email: Invoice email fields (order_id, to, tracking, carrier)
         invoice_path: Path to invoice PDF
     """
+    order_id = email["order_id"]
     if celery_app.conf.task_always_eager:
         logger.info("Eager mode: skipping invoice email for order %s", order_id)
         return {"status": "skipped"}
 
     try:
-        logger.info(f"Sending invoice email for order {order_id}")
+        logger.info("Sending invoice email for order %s", order_id)
         
         # TODO: Implement email sending logic
-        from app.utils.email_sender import EmailSender
         sender = EmailSender()
-        sender.send_invoice(order_id, invoice_path)
+        sender.send_invoice(email, invoice_path)
         
-        logger.info(f"Invoice email sent for order {order_id}")
+        logger.info("Invoice email sent for order %s", order_id)
+    except Exception as exc:
+        logger.error("Failed to send invoice email for order %s: %s", order_id, exc)
+        raise self.retry(exc=exc)
+
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
+def send_invoice_email_batch(self, jobs: list):
+    """
+    Send invoice emails for several orders over concurrent SMTP sessions.
+
+    Messages that fail are re-enqueued individually via send_invoice_email so
+    one bad recipient does not force the whole batch to be resent.
+
+    Args:
+        jobs: [email, invoice_path] pairs as accepted by send_invoice_email
+    """
+    if celery_app.conf.task_always_eager:
+        logger.info("Eager mode: skipping invoice email batch of %s", len(jobs))
+        return {"status": "skipped"}
+
+    try:
+        logger.info("Sending invoice email batch of %s", len(jobs))
+
+        sender = EmailSender()
+        failed = sender.send_invoices([tuple(job) for job in jobs])
+
+        for email, invoice_path in failed:
+            send_invoice_email.delay(email, invoice_path)
+
+        logger.info("Invoice email batch sent: %s ok, %s re-enqueued", len(jobs) - len(failed), len(failed))
+        return {"status": "sent", "failed": len(failed)}
     except Exception as exc:
-        logger.error(f"Failed to send invoice email for order {order_id}: {exc}")
+        logger.error("Failed to send invoice email batch: %s", exc)
         raise self.retry(exc=exc)
 
 
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
-def send_refund_email(self, return_id: int, transaction_id: str):
+def send_refund_email(self, email: dict, transaction_id: str):
     """
     Send refund confirmation email to customer.
     
     Args:
-        return_id: Return request ID
+        email: Refund email fields (return_id, to, refund_amount)
         transaction_id: Refund transaction ID
     """
+    return_id = email["return_id"]
     if celery_app.conf.task_always_eager:
         logger.info("Eager mode: skipping refund email for return %s", return_id)
         return {"status": "skipped"}
 
     try:
-        logger.info(f"Sending refund email for return {return_id}")
+        logger.info("Sending refund email for return %s", return_id)
         
         # TODO: Implement email sending logic
-        from app.utils.email_sender import EmailSender
         sender = EmailSender()
-        sender.send_refund_confirmation(return_id, transaction_id)
+        sender.send_refund_confirmation(email, transaction_id)
         
-        logger.info(f"Refund email sent for return {return_id}")
+        logger.info("Refund email sent for return %s", return_id)
     except Exception as exc:
-        logger.error(f"Failed to send refund email for return {return_id}: {exc}")
+        logger.error("Failed to send refund email for return %s: %s", return_id, exc)
         raise self.retry(exc=exc)
 
 
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
-def send_order_confirmation_email(self, order_id: int):
-    """Send order confirmation email."""
+def send_order_confirmation_email(self, email: dict):
+    """
+    Send order confirmation email.
+
+    Args:
+        email: Order confirmation fields (order_id, to, total)
+    """
+    order_id = email["order_id"]
     if celery_app.conf.task_always_eager:
         logger.info("Eager mode: skipping order confirmation email for order %s", order_id)
         return {"status": "skipped"}
 
     try:
-        logger.info(f"Sending order confirmation email for order {order_id}")
+        logger.info("Sending order confirmation email for order %s", order_id)
         
-        from app.utils.email_sender import EmailSender
         sender = EmailSender()
-        sender.send_order_confirmation(order_id)
+        sender.send_order_confirmation(email)
         
-        logger.info(f"Order confirmation email sent for order {order_id}")
+        logger.info("Order confirmation email sent for order %s", order_id)
     except Exception as exc:
-        logger.error(f"Failed to send order confirmation email for order {order_id}: {exc}")
+        logger.error("Failed to send order confirmation email for order %s: %s", order_id, exc)
         raise self.retry(exc=exc)
@@ -1,31 +1,19 @@
 """
 Refund processing background tasks.
 """
-from celery import Task
+from celery.exceptions import Retry
 from app.tasks.celery_app import celery_app
-from app.database import SessionLocal
+from app.tasks.base import DatabaseTask, retry_countdown
+from app.tasks.notification_tasks import send_refund_email
 from app.models.return_request import ReturnRequest
+from app.utils.email_sender import resolve_email
 from app.utils.exceptions import RetryableError
 import logging
 
 logger = logging.getLogger(__name__)
 
-
-class DatabaseTask(Task):
-    """Base task that provides database session."""
-    
-    _db = None
-
-    @property
-    def db(self):
-        if self._db is None:
-            self._db = SessionLocal()
-        return self._db
-
-    def after_return(self, *args, **kwargs):
-        if self._db is not None:
-            self._db.close()
-            self._db = None
+RETRY_BACKOFF_MAX = 1800  # 30 minutes
+LOCKED_RETRY_COUNTDOWN = 5  # seconds
 
 
 @celery_app.task(
@@ -33,16 +21,13 @@ class DatabaseTask(Task):
     base=DatabaseTask,
     max_retries=5,
     default_retry_delay=120,  # 2 minutes
-    retry_backoff=True,
-    retry_backoff_max=1800,  # 30 minutes
-    retry_jitter=True,
 )
 def process_refund(self, return_id: int):
     """
     Process refund for a completed return.
     
     Triggered when return transitions to COMPLETED state.
-    Retries: 5 attempts with exponential backoff.
+    Retries: 5 attempts with jittered exponential backoff.
     Alerts on final failure.
     
     Args:
@@ -53,17 +38,27 @@ def process_refund(self, return_id: int):
         return {"status": "skipped"}
 
     try:
-        logger.info(f"Processing refund for return {return_id}")
+        logger.info("Processing refund for return %s", return_id)
         
-        # Get return request
-        return_request = self.db.query(ReturnRequest).filter(ReturnRequest.id == return_id).first()
+        # Lock the row so a duplicate delivery cannot refund concurrently;
+        # SKIP LOCKED returns nothing instead of waiting on the other worker
+        return_request = (
+            self.db.query(ReturnRequest)
+            .filter(ReturnRequest.id == return_id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
         if not return_request:
-            logger.error(f"Return request {return_id} not found")
+            exists = self.db.query(ReturnRequest.id).filter(ReturnRequest.id == return_id).scalar()
+            if exists is not None:
+                logger.info("Return %s is being refunded by another worker", return_id)
+                raise self.retry(countdown=LOCKED_RETRY_COUNTDOWN)
+            logger.error("Return request %s not found", return_id)
             return
 
         # Check if refund already processed (idempotency)
         if return_request.refund_transaction_id:
-            logger.info(f"Refund already processed for return {return_id}")
+            logger.info("Refund already processed for return %s", return_id)
             return
 
         # Process refund via payment gateway
@@ -72,24 +67,37 @@ def process_refund(self, return_id: int):
         
         # Store transaction ID
         return_request.refund_transaction_id = transaction_id
-        if not return_request.metadata:
-            return_request.metadata = {}
-        return_request.metadata["refund_processed"] = True
-        return_request.metadata["refund_transaction_id"] = transaction_id
+        # Reassign so the JSON column change is tracked
+        return_request.extra_metadata = {
+            **(return_request.extra_metadata or {}),
+            "refund_processed": True,
+            "refund_transaction_id": transaction_id,
+        }
         self.db.commit()
 
         # Send refund confirmation email
-        from app.tasks.notification_tasks import send_refund_email
-        send_refund_email.delay(return_id, transaction_id)
+        send_refund_email.delay(
+            {
+                "return_id": return_id,
+                "to": resolve_email(return_request.requested_by),
+                "refund_amount": str(return_request.refund_amount),
+            },
+            transaction_id,
+        )
 
-        logger.info(f"Refund processed successfully for return {return_id}: {transaction_id}")
+        logger.info("Refund processed successfully for return %s: %s", return_id, transaction_id)
 
+    except Retry:
+        raise
     except Exception as exc:
-        logger.error(f"Failed to process refund for return {return_id}: {exc}")
+        logger.error("Failed to process refund for return %s: %s", return_id, exc)
         
         # Alert on final retry
         if self.request.retries >= self.max_retries - 1:
-            logger.critical(f"ALERT: Final refund retry failed for return {return_id}")
+            logger.critical("ALERT: Final refund retry failed for return %s", return_id)
             # TODO: Send alert to operations team
         
-        raise self.retry(exc=exc)
+        raise self.retry(
+            exc=exc,
+            countdown=retry_countdown(self.request.retries, self.default_retry_delay, RETRY_BACKOFF_MAX),
+        )
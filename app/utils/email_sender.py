@@ -1,19 +1,64 @@
 """
 Email sending utility.
 """
+import asyncio
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
+import mimetypes
+import mmap
+import threading
+import aiosmtplib
+from email.message import EmailMessage
 from pathlib import Path
+from typing import Optional
 from app.config import settings
-from app.database import SessionLocal
-from app.models.order import Order
-from app.models.return_request import ReturnRequest
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Long-lived SMTP connection per thread, reused by every send_email on it
+_smtp_local = threading.local()
+
+
+def resolve_email(customer_id: str) -> str:
+    """
+    Resolve the email address for a customer.
+
+    Args:
+        customer_id: Customer identifier
+
+    Returns:
+        Recipient email address
+    """
+    # TODO: Get customer email from customer service
+    return f"{customer_id}@example.com"
+
+
+def close_smtp_connection():
+    """Close this thread's persistent SMTP connection, if one is open."""
+    conn = getattr(_smtp_local, "conn", None)
+    if conn is None:
+        return
+    _smtp_local.conn = None
+    try:
+        conn.quit()
+    except (smtplib.SMTPException, OSError):
+        conn.close()
+
+
+def _is_connection_error(exc: Exception) -> bool:
+    """
+    Whether an SMTP error means the connection itself is unusable.
+
+    smtplib.SMTPException subclasses OSError, so protocol errors such as a
+    refused recipient are excluded; a 421 reply is the server closing the
+    channel (e.g. an idle timeout).
+    """
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code == 421
+    return isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+
 
 class EmailSender:
     """Send emails via SMTP."""
@@ -24,6 +69,7 @@ class EmailSender:
         self.smtp_user = settings.SMTP_USER
         self.smtp_password = settings.SMTP_PASSWORD
         self.from_address = settings.EMAIL_FROM
+        self.max_connections = settings.SMTP_MAX_CONNECTIONS
 
     def send_email(
         self,
@@ -42,117 +88,234 @@ class EmailSender:
             attachments: List of file paths to attach
         """
         try:
-            msg = MIMEMultipart()
-            msg["From"] = self.from_address
-            msg["To"] = to_address
-            msg["Subject"] = subject
-
-            msg.attach(MIMEText(html_body, "html"))
-
-            # Add attachments
-            if attachments:
-                for file_path in attachments:
-                    with open(file_path, "rb") as f:
-                        part = MIMEApplication(f.read(), Name=Path(file_path).name)
-                    part["Content-Disposition"] = f'attachment; filename="{Path(file_path).name}"'
-                    msg.attach(part)
+            msg = self._build_message(to_address, subject, html_body, attachments)
 
             # Send via SMTP
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                if self.smtp_user and self.smtp_password:
-                    server.starttls()
-                    server.login(self.smtp_user, self.smtp_password)
-                server.send_message(msg)
+            self._send_persistent(msg)
 
-            logger.info(f"Email sent to {to_address}: {subject}")
+            logger.info("Email sent to %s: %s", to_address, subject)
 
         except Exception as e:
-            logger.error(f"Failed to send email to {to_address}: {e}")
+            logger.error("Failed to send email to %s: %s", to_address, e)
             raise
 
-    def send_invoice(self, order_id: int, invoice_path: str):
-        """Send invoice email to customer."""
-        db = SessionLocal()
-        try:
-            order = db.query(Order).filter(Order.id == order_id).first()
-            if not order:
-                logger.error(f"Order {order_id} not found")
-                return
+    async def send_bulk_async(self, messages: list[tuple]) -> list[tuple]:
+        """
+        Send several emails over concurrent SMTP sessions.
 
-            # TODO: Get customer email from customer service
-            to_address = f"{order.customer_id}@example.com"
-
-            subject = f"Your Invoice - Order #{order.id}"
-            body = f"""
-            <html>
-            <body>
-                <h2>Order Shipped!</h2>
-                <p>Your order #{order.id} has been shipped.</p>
-                <p>Tracking Number: {order.tracking_number}</p>
-                <p>Carrier: {order.carrier}</p>
-                <p>Please find your invoice attached.</p>
-                <p>Thank you for shopping with ArtiCurated!</p>
-            </body>
-            </html>
-            """
-
-            self.send_email(to_address, subject, body, attachments=[invoice_path])
-        finally:
-            db.close()
-
-    def send_refund_confirmation(self, return_id: int, transaction_id: str):
-        """Send refund confirmation email."""
-        db = SessionLocal()
-        try:
-            return_request = db.query(ReturnRequest).filter(ReturnRequest.id == return_id).first()
-            if not return_request:
-                logger.error(f"Return request {return_id} not found")
+        Messages are spread across up to SMTP_MAX_CONNECTIONS sessions that
+        run concurrently; each session sends its share back to back, so the
+        handshake cost is paid once per session rather than once per message.
+
+        Args:
+            messages: (to_address, subject, html_body, attachments) tuples
+
+        Returns:
+            The tuples that could not be sent, for the caller to retry
+        """
+        shards = [messages[i::self.max_connections] for i in range(self.max_connections)]
+        shards = [shard for shard in shards if shard]
+        results = await asyncio.gather(
+            *(self._send_session_async(shard) for shard in shards),
+            return_exceptions=True,
+        )
+
+        failed = []
+        for shard, result in zip(shards, results, strict=True):
+            if isinstance(result, BaseException):
+                logger.error("SMTP session failed for %s emails: %s", len(shard), result)
+                failed.extend(shard)
+            else:
+                failed.extend(result)
+        return failed
+
+    async def _send_session_async(self, messages: list[tuple]) -> list[tuple]:
+        """Send messages sequentially over one async SMTP session."""
+        failed = []
+        async with self._connect_async() as server:
+            for message in messages:
+                to_address, subject = message[0], message[1]
+                try:
+                    await server.send_message(self._build_message(*message))
+                    logger.info("Email sent to %s: %s", to_address, subject)
+                except Exception as e:
+                    logger.error("Failed to send email to %s: %s", to_address, e)
+                    failed.append(message)
+        return failed
+
+    def _build_message(
+        self,
+        to_address: str,
+        subject: str,
+        html_body: str,
+        attachments: Optional[list[str]] = None,
+    ) -> EmailMessage:
+        """Build the MIME message for one email."""
+        msg = EmailMessage()
+        msg["From"] = self.from_address
+        msg["To"] = to_address
+        msg["Subject"] = subject
+
+        msg.set_content(html_body, subtype="html")
+
+        # Add attachments
+        if attachments:
+            for file_path in attachments:
+                self._attach_file(msg, Path(file_path))
+
+        return msg
+
+    @staticmethod
+    def _attach_file(msg: EmailMessage, path: Path):
+        """
+        Attach a file, base64-encoding it straight from a memory map.
+
+        The raw file is paged in lazily by the OS instead of being copied
+        into a bytes object alongside its encoded form.
+        """
+        content_type, _ = mimetypes.guess_type(path.name)
+        maintype, subtype = (content_type or "application/octet-stream").split("/", 1)
+
+        with open(path, "rb") as f:
+            if path.stat().st_size == 0:
+                msg.add_attachment(b"", maintype=maintype, subtype=subtype, filename=path.name)
                 return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf, memoryview(buf) as view:
+                msg.add_attachment(view, maintype=maintype, subtype=subtype, filename=path.name)
 
-            # TODO: Get customer email
-            to_address = f"{return_request.requested_by}@example.com"
-
-            subject = f"Refund Processed - Return #{return_id}"
-            body = f"""
-            <html>
-            <body>
-                <h2>Refund Processed</h2>
-                <p>Your refund for return request #{return_id} has been processed.</p>
-                <p>Refund Amount: ${return_request.refund_amount}</p>
-                <p>Transaction ID: {transaction_id}</p>
-                <p>The refund should appear in your account within 5-7 business days.</p>
-                <p>Thank you for your patience!</p>
-            </body>
-            </html>
-            """
-
-            self.send_email(to_address, subject, body)
-        finally:
-            db.close()
-
-    def send_order_confirmation(self, order_id: int):
-        """Send order confirmation email."""
-        db = SessionLocal()
+    def _send_persistent(self, msg: EmailMessage):
+        """
+        Send over the calling thread's persistent SMTP connection.
+
+        The connection is opened on first use and kept for the life of the
+        thread. If it has become unusable (dropped, timed out, reset),
+        reconnect and resend once.
+        """
+        conn = getattr(_smtp_local, "conn", None)
+        if conn is None:
+            conn = _smtp_local.conn = self._connect()
         try:
-            order = db.query(Order).filter(Order.id == order_id).first()
-            if not order:
-                logger.error(f"Order {order_id} not found")
-                return
+            conn.send_message(msg)
+        except Exception as exc:
+            if not _is_connection_error(exc):
+                raise
+            logger.info("SMTP connection unusable (%s), reconnecting", exc)
+            close_smtp_connection()
+            conn = _smtp_local.conn = self._connect()
+            conn.send_message(msg)
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open an SMTP connection, authenticating when credentials are configured."""
+        server = smtplib.SMTP(self.smtp_host, self.smtp_port)
+        if self.smtp_user and self.smtp_password:
+            server.starttls()
+            server.login(self.smtp_user, self.smtp_password)
+        return server
+
+    def _connect_async(self) -> aiosmtplib.SMTP:
+        """Create an async SMTP client; it connects and authenticates on enter."""
+        authenticate = bool(self.smtp_user and self.smtp_password)
+        return aiosmtplib.SMTP(
+            hostname=self.smtp_host,
+            port=self.smtp_port,
+            username=self.smtp_user if authenticate else None,
+            password=self.smtp_password if authenticate else None,
+            start_tls=authenticate,
+        )
+
+    def send_invoice(self, email: dict, invoice_path: str):
+        """
+        Send invoice email to customer.
+
+        Args:
+            email: Invoice email fields (order_id, to, tracking, carrier)
+            invoice_path: Path to invoice PDF
+        """
+        self.send_email(*self.build_invoice_email(email, invoice_path))
+
+    def send_invoices(self, jobs: list[tuple[dict, str]]) -> list[tuple[dict, str]]:
+        """
+        Send invoice emails for several orders over concurrent SMTP sessions.
+
+        Args:
+            jobs: (email, invoice_path) pairs as accepted by send_invoice
+
+        Returns:
+            The (email, invoice_path) pairs whose email failed to send
+        """
+        messages = {self.build_invoice_email(email, path): (email, path) for email, path in jobs}
+        if not messages:
+            return []
+        failed = asyncio.run(self.send_bulk_async(list(messages)))
+        return [messages[message] for message in failed]
+
+    def build_invoice_email(self, email: dict, invoice_path: str) -> tuple:
+        """
+        Build the invoice email for an order.
+
+        Returns:
+            (to_address, subject, html_body, attachments) tuple
+        """
+        order_id = email["order_id"]
+        subject = f"Your Invoice - Order #{order_id}"
+        body = f"""
+        <html>
+        <body>
+            <h2>Order Shipped!</h2>
+            <p>Your order #{order_id} has been shipped.</p>
+            <p>Tracking Number: {email["tracking"]}</p>
+            <p>Carrier: {email["carrier"]}</p>
+            <p>Please find your invoice attached.</p>
+            <p>Thank you for shopping with ArtiCurated!</p>
+        </body>
+        </html>
+        """
+
+        return email["to"], subject, body, (invoice_path,)
+
+    def send_refund_confirmation(self, email: dict, transaction_id: str):
+        """
+        Send refund confirmation email.
+
+        Args:
+            email: Refund email fields (return_id, to, refund_amount)
+            transaction_id: Refund transaction ID
+        """
+        return_id = email["return_id"]
+        subject = f"Refund Processed - Return #{return_id}"
+        body = f"""
+        <html>
+        <body>
+            <h2>Refund Processed</h2>
+            <p>Your refund for return request #{return_id} has been processed.</p>
+            <p>Refund Amount: ${email["refund_amount"]}</p>
+            <p>Transaction ID: {transaction_id}</p>
+            <p>The refund should appear in your account within 5-7 business days.</p>
+            <p>Thank you for your patience!</p>
+        </body>
+        </html>
+        """
+
+        self.send_email(email["to"], subject, body)
+
+    def send_order_confirmation(self, email: dict):
+        """
+        Send order confirmation email.
+
+        Args:
+            email: Order confirmation fields (order_id, to, total)
+        """
+        order_id = email["order_id"]
+        subject = f"Order Confirmation - #{order_id}"
+        body = f"""
+        <html>
+        <body>
+            <h2>Order Confirmed!</h2>
+            <p>Thank you for your order #{order_id}.</p>
+            <p>Total: ${email["total"]}</p>
+            <p>We'll notify you when your order ships.</p>
+        </body>
+        </html>
+        """
 
-            to_address = f"{order.customer_id}@example.com"
-
-            subject = f"Order Confirmation - #{order.id}"
-            body = f"""
-            <html>
-            <body>
-                <h2>Order Confirmed!</h2>
-                <p>Thank you for your order #{order.id}.</p>
-                <p>Total: ${order.total}</p>
-                <p>We'll notify you when your order ships.</p>
-            </body>
-            </html>
-            """
-
-            self.send_email(to_address, subject, body)
-        finally:
-            db.close()
+        self.send_email(email["to"], subject, body)
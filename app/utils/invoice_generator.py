@@ -1,21 +1,37 @@
 """
 Invoice PDF generation utility.
 """
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from jinja2 import Environment, FileSystemLoader
 from app.models.order import Order
 from app.config import settings
+from app.utils.storage import ensure_dir
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent file writes when flushing a batch of PDFs
+MAX_WRITE_WORKERS = 8
+
+TEMPLATE_DIR = Path(__file__).resolve().parents[2] / "templates"
+
+# Compiled once per process; rendering reuses the generated bytecode
+_TEMPLATE_ENV = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=True)
+_INVOICE_TMPL = _TEMPLATE_ENV.get_template("invoices/invoice.html")
+_INVOICE_BATCH_TMPL = _TEMPLATE_ENV.get_template("invoices/invoice_batch.html")
+
 
 class InvoiceGenerator:
     """Generate invoice PDFs from order data."""
 
+    # Font discovery is expensive; share one configuration across renders
+    _font_config = None
+
     def __init__(self):
         self.storage_path = Path(settings.STORAGE_PATH) / "invoices"
-        self.storage_path.mkdir(parents=True, exist_ok=True)
+        ensure_dir(self.storage_path)
 
     def generate(self, order: Order) -> str:
         """
@@ -38,15 +54,84 @@ class InvoiceGenerator:
 
             # Generate PDF using WeasyPrint
             from weasyprint import HTML
-            HTML(string=html_content).write_pdf(output_path)
+            HTML(string=html_content).write_pdf(output_path, font_config=self._get_font_config())
 
-            logger.info(f"Invoice generated: {output_path}")
+            logger.info("Invoice generated: %s", output_path)
             return str(output_path)
 
         except Exception as e:
-            logger.error(f"Failed to generate invoice for order {order.id}: {e}")
+            logger.error("Failed to generate invoice for order %s: %s", order.id, e)
             raise
 
+    def generate_many(self, orders: list[Order]) -> dict[int, str]:
+        """
+        Generate invoice PDFs for several orders with a single WeasyPrint render.
+
+        All invoices are laid out as one document, one page-broken section per
+        order, so stylesheet parsing and layout setup happen once. The rendered
+        pages are then split back into one PDF per order using the section
+        anchors.
+
+        Args:
+            orders: Order model instances
+
+        Returns:
+            Mapping of order ID to generated invoice PDF path
+        """
+        if not orders:
+            return {}
+
+        from weasyprint import HTML
+
+        timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        html_content = _INVOICE_BATCH_TMPL.render(orders=orders)
+        document = HTML(string=html_content).render(font_config=self._get_font_config())
+
+        # Assign each page to the order whose section starts on or before it
+        anchors = {f"order-{order.id}": order.id for order in orders}
+        pages_by_order: dict[int, list] = {}
+        current = orders[0].id
+        for page in document.pages:
+            for anchor in page.anchors:
+                if anchor in anchors:
+                    current = anchors[anchor]
+                    break
+            pages_by_order.setdefault(current, []).append(page)
+
+        # Render every PDF to memory first, then flush the files together
+        files = {
+            order_id: (
+                self.storage_path / f"invoice_{order_id}_{timestamp}.pdf",
+                document.copy(pages).write_pdf(),
+            )
+            for order_id, pages in pages_by_order.items()
+        }
+        self._write_files(list(files.values()))
+        paths = {order_id: str(output_path) for order_id, (output_path, _) in files.items()}
+
+        logger.info("Generated %s invoices in one batch", len(paths))
+        return paths
+
+    @staticmethod
+    def _write_files(files: list[tuple[Path, bytes]]):
+        """
+        Write several files with the writes in flight concurrently.
+
+        Keeping multiple writes outstanding lets the storage device work on
+        them in parallel instead of one blocking write(2) after another.
+        """
+        with ThreadPoolExecutor(max_workers=min(MAX_WRITE_WORKERS, len(files))) as pool:
+            # list() surfaces the first write error, if any
+            list(pool.map(lambda item: item[0].write_bytes(item[1]), files))
+
+    @classmethod
+    def _get_font_config(cls):
+        """Return the shared WeasyPrint font configuration."""
+        if cls._font_config is None:
+            from weasyprint.text.fonts import FontConfiguration
+            cls._font_config = FontConfiguration()
+        return cls._font_config
+
     def _render_invoice_html(self, order: Order) -> str:
         """
         Render invoice HTML from order data.
@@ -57,68 +142,4 @@ class InvoiceGenerator:
         Returns:
             HTML string
         """
-        # TODO: Use Jinja2 template for better formatting
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <title>Invoice - Order #{order.id}</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                .header {{ text-align: center; margin-bottom: 30px; }}
-                .details {{ margin-bottom: 20px; }}
-                table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
-                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                th {{ background-color: #f2f2f2; }}
-                .totals {{ text-align: right; margin-top: 20px; }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>INVOICE</h1>
-                <p>Order #{order.id}</p>
-                <p>Date: {order.created_at.strftime('%Y-%m-%d')}</p>
-            </div>
-            
-            <div class="details">
-                <h3>Customer Information</h3>
-                <p>Customer ID: {order.customer_id}</p>
-                <p>Shipping Address: {order.shipping_address.get('street', '')}, 
-                   {order.shipping_address.get('city', '')}, 
-                   {order.shipping_address.get('state', '')} 
-                   {order.shipping_address.get('postal_code', '')}</p>
-            </div>
-            
-            <h3>Order Items</h3>
-            <table>
-                <thead>
-                    <tr>
-                        <th>Product</th>
-                        <th>Quantity</th>
-                        <th>Unit Price</th>
-                        <th>Subtotal</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {''.join([
-                        f"<tr><td>{item.product_name}</td><td>{item.quantity}</td><td>${item.unit_price}</td><td>${item.subtotal}</td></tr>"
-                        for item in order.line_items
-                    ])}
-                </tbody>
-            </table>
-            
-            <div class="totals">
-                <p>Subtotal: ${order.subtotal}</p>
-                <p>Tax: ${order.tax}</p>
-                <p>Shipping: ${order.shipping_cost}</p>
-                <p><strong>Total: ${order.total}</strong></p>
-            </div>
-            
-            <div style="margin-top: 40px; text-align: center; color: #666;">
-                <p>Thank you for your business!</p>
-            </div>
-        </body>
-        </html>
-        """
-        return html
+        return _INVOICE_TMPL.render(order=order)
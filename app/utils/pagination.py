@@ -0,0 +1,38 @@
+"""
+Keyset (cursor) pagination helpers.
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Tuple
+from app.utils.exceptions import ValidationError
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Encode the last seen (created_at, id) pair as an opaque cursor.
+
+    Args:
+        created_at: Creation timestamp of the last row on the page
+        row_id: Primary key of the last row on the page
+
+    Returns:
+        URL-safe base64 cursor string
+    """
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValidationError: Cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationError("Invalid pagination cursor", field="cursor")
@@ -1,6 +1,7 @@
 """
 Storage abstraction for local and cloud storage.
 """
+from functools import lru_cache
 from pathlib import Path
 from typing import BinaryIO
 from app.config import settings
@@ -9,6 +10,16 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1024)
+def ensure_dir(path: Path) -> None:
+    """
+    Create a directory (and parents) once per process.
+
+    Later calls for the same path are a cache hit with no filesystem syscalls.
+    """
+    path.mkdir(parents=True, exist_ok=True)
+
+
 class StorageService:
     """Abstraction for file storage (local or S3)."""
 
@@ -37,12 +48,12 @@ class StorageService:
     def _save_local(self, file_path: str, content: BinaryIO) -> str:
         """Save file to local filesystem."""
         full_path = self.storage_path / file_path
-        full_path.parent.mkdir(parents=True, exist_ok=True)
+        ensure_dir(full_path.parent)
         
         with open(full_path, "wb") as f:
             f.write(content.read())
         
-        logger.info(f"File saved locally: {full_path}")
+        logger.info("File saved locally: %s", full_path)
         return str(full_path)
 
     def _save_s3(self, file_path: str, content: BinaryIO) -> str:
@@ -61,7 +72,7 @@ class StorageService:
         s3_client.upload_fileobj(content, bucket, file_path)
         
         url = f"https://{bucket}.s3.{settings.AWS_REGION}.amazonaws.com/{file_path}"
-        logger.info(f"File uploaded to S3: {url}")
+        logger.info("File uploaded to S3: %s", url)
         return url
 
     def get_url(self, file_path: str) -> str:
@@ -18,3 +18,11 @@ __all__ = [
     "adversarial_tests",
     "pru_tracker",
 ]
+
+
+def __getattr__(name):
+    """Import tool modules on first attribute access."""
+    if name in __all__:
+        import importlib
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,36 @@
+"""
+Shared JSON output helpers for the CLI tools.
+"""
+
+import argparse
+import json
+import sys
+from typing import Optional
+
+
+def dumps(obj, compact: Optional[bool] = None) -> str:
+    """
+    Serialize a result for stdout.
+
+    Pretty-printed for a terminal; compact (via orjson when installed) when
+    piped, since the consumer is then another program.
+    """
+    if compact is None:
+        compact = not sys.stdout.isatty()
+    if not compact:
+        return json.dumps(obj, indent=2)
+    try:
+        import orjson
+    except ImportError:
+        return json.dumps(obj, separators=(",", ":"))
+    return orjson.dumps(obj).decode()
+
+
+def add_compact_flag(parser: argparse.ArgumentParser) -> None:
+    """Add the --compact/--no-compact option read by dumps()."""
+    parser.add_argument(
+        "--compact",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Compact JSON output (default: on when stdout is not a terminal)"
+    )
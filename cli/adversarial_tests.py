@@ -10,11 +10,55 @@ Usage:
 """
 
 import sys
-import json
-import argparse
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List
 
+try:
+    from cli._output import add_compact_flag, dumps
+except ImportError:  # run as a script, with cli/ as sys.path[0]
+    from _output import add_compact_flag, dumps
+
+PYTEST_TEMPLATE = '''"""
+Adversarial Security Tests for {{ target_name }}
+Generated by adversarial_tests.py
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+{% for test_case in test_cases %}
+
+def {{ test_case.name }}():
+    """
+    {{ test_case.description }}
+    
+    Exploit Type: {{ test_case.exploit_type }}
+    Severity: {{ test_case.severity }}
+    """
+    # TODO: Implement test
+    pytest.skip("Test skeleton - needs implementation")
+
+{% endfor %}'''
+
+@lru_cache(maxsize=None)
+def _pytest_template():
+    """
+    Compile the pytest template on first render and reuse it afterwards.
+
+    jinja2 is only imported here, so JSON output never pays for it.
+    """
+    import jinja2
+
+    env = jinja2.Environment(
+        loader=jinja2.DictLoader({"pytest.j2": PYTEST_TEMPLATE}),
+        auto_reload=False,
+        cache_size=-1,
+        trim_blocks=True,
+        keep_trailing_newline=True,
+    )
+    return env.get_template("pytest.j2")
+
 
 def generate_test_skeletons(
     target_file: Path,
@@ -57,8 +101,12 @@ def generate_test_skeletons(
 
 def classify_target_type(target_file: Path) -> str:
     """Classify target file to generate appropriate tests."""
-    path_str = str(target_file).lower()
-    
+    return _classify_path(str(target_file).lower())
+
+
+@lru_cache(maxsize=1024)
+def _classify_path(path_str: str) -> str:
+    """Classify a lowercased target path; checks run in priority order."""
     if "api/" in path_str or "routes" in path_str:
         return "api"
     elif "auth" in path_str or "security" in path_str:
@@ -71,159 +119,85 @@ def classify_target_type(target_file: Path) -> str:
         return "generic"
 
 
-def generate_api_tests(target_name: str) -> List[Dict]:
-    """Generate adversarial API tests."""
+# Test case tables: (name suffix, description, exploit type, severity)
+_API_TESTS = (
+    ("injection_protection", "Test SQL injection protection", "injection", "HIGH"),
+    ("authentication_required", "Test unauthenticated access blocked", "auth_bypass", "CRITICAL"),
+    ("invalid_input_handling", "Test malformed input rejection", "input_validation", "MEDIUM"),
+    ("rate_limiting", "Test rate limit enforcement", "dos", "MEDIUM"),
+)
+
+_SERVICE_TESTS = (
+    ("invalid_state_transition", "Test invalid state transition rejection", "business_logic", "HIGH"),
+    ("race_condition", "Test concurrent access safety", "race_condition", "HIGH"),
+    ("boundary_values", "Test edge case handling", "boundary", "MEDIUM"),
+)
+
+_AUTH_TESTS = (
+    ("token_tampering", "Test JWT/token tampering detection", "token_tampering", "CRITICAL"),
+    ("privilege_escalation", "Test privilege escalation prevention", "privilege_escalation", "CRITICAL"),
+    ("session_fixation", "Test session fixation protection", "session_fixation", "HIGH"),
+)
+
+_PAYMENT_TESTS = (
+    ("double_refund_prevention", "Test duplicate refund rejection", "double_spend", "CRITICAL"),
+    ("amount_tampering", "Test payment amount manipulation prevention", "amount_tampering", "CRITICAL"),
+    ("idempotency", "Test idempotent payment processing", "replay_attack", "HIGH"),
+)
+
+_GENERIC_TESTS = (
+    ("error_disclosure", "Test sensitive info not leaked in errors", "information_disclosure", "MEDIUM"),
+    ("input_sanitization", "Test input sanitization", "xss", "MEDIUM"),
+)
+
+
+def _build_tests(table: tuple, target_name: str) -> List[Dict]:
+    """Expand a test case table into test case dicts for a target."""
     return [
         {
-            "name": f"test_{target_name}_injection_protection",
-            "description": "Test SQL injection protection",
-            "exploit_type": "injection",
-            "severity": "HIGH"
-        },
-        {
-            "name": f"test_{target_name}_authentication_required",
-            "description": "Test unauthenticated access blocked",
-            "exploit_type": "auth_bypass",
-            "severity": "CRITICAL"
-        },
-        {
-            "name": f"test_{target_name}_invalid_input_handling",
-            "description": "Test malformed input rejection",
-            "exploit_type": "input_validation",
-            "severity": "MEDIUM"
-        },
-        {
-            "name": f"test_{target_name}_rate_limiting",
-            "description": "Test rate limit enforcement",
-            "exploit_type": "dos",
-            "severity": "MEDIUM"
-        },
+            "name": f"test_{target_name}_{suffix}",
+            "description": description,
+            "exploit_type": exploit_type,
+            "severity": severity
+        }
+        for suffix, description, exploit_type, severity in table
     ]
 
 
+def generate_api_tests(target_name: str) -> List[Dict]:
+    """Generate adversarial API tests."""
+    return _build_tests(_API_TESTS, target_name)
+
+
 def generate_service_tests(target_name: str) -> List[Dict]:
     """Generate adversarial service layer tests."""
-    return [
-        {
-            "name": f"test_{target_name}_invalid_state_transition",
-            "description": "Test invalid state transition rejection",
-            "exploit_type": "business_logic",
-            "severity": "HIGH"
-        },
-        {
-            "name": f"test_{target_name}_race_condition",
-            "description": "Test concurrent access safety",
-            "exploit_type": "race_condition",
-            "severity": "HIGH"
-        },
-        {
-            "name": f"test_{target_name}_boundary_values",
-            "description": "Test edge case handling",
-            "exploit_type": "boundary",
-            "severity": "MEDIUM"
-        },
-    ]
+    return _build_tests(_SERVICE_TESTS, target_name)
 
 
 def generate_auth_tests(target_name: str) -> List[Dict]:
     """Generate authentication/authorization adversarial tests."""
-    return [
-        {
-            "name": f"test_{target_name}_token_tampering",
-            "description": "Test JWT/token tampering detection",
-            "exploit_type": "token_tampering",
-            "severity": "CRITICAL"
-        },
-        {
-            "name": f"test_{target_name}_privilege_escalation",
-            "description": "Test privilege escalation prevention",
-            "exploit_type": "privilege_escalation",
-            "severity": "CRITICAL"
-        },
-        {
-            "name": f"test_{target_name}_session_fixation",
-            "description": "Test session fixation protection",
-            "exploit_type": "session_fixation",
-            "severity": "HIGH"
-        },
-    ]
+    return _build_tests(_AUTH_TESTS, target_name)
 
 
 def generate_payment_tests(target_name: str) -> List[Dict]:
     """Generate payment/refund adversarial tests."""
-    return [
-        {
-            "name": f"test_{target_name}_double_refund_prevention",
-            "description": "Test duplicate refund rejection",
-            "exploit_type": "double_spend",
-            "severity": "CRITICAL"
-        },
-        {
-            "name": f"test_{target_name}_amount_tampering",
-            "description": "Test payment amount manipulation prevention",
-            "exploit_type": "amount_tampering",
-            "severity": "CRITICAL"
-        },
-        {
-            "name": f"test_{target_name}_idempotency",
-            "description": "Test idempotent payment processing",
-            "exploit_type": "replay_attack",
-            "severity": "HIGH"
-        },
-    ]
+    return _build_tests(_PAYMENT_TESTS, target_name)
 
 
 def generate_generic_tests(target_name: str) -> List[Dict]:
     """Generate generic adversarial tests."""
-    return [
-        {
-            "name": f"test_{target_name}_error_disclosure",
-            "description": "Test sensitive info not leaked in errors",
-            "exploit_type": "information_disclosure",
-            "severity": "MEDIUM"
-        },
-        {
-            "name": f"test_{target_name}_input_sanitization",
-            "description": "Test input sanitization",
-            "exploit_type": "xss",
-            "severity": "MEDIUM"
-        },
-    ]
+    return _build_tests(_GENERIC_TESTS, target_name)
 
 
 def generate_pytest_code(test_cases: List[Dict], target_name: str) -> str:
     """Generate pytest Python code from test case definitions."""
-    code_lines = [
-        '"""',
-        f'Adversarial Security Tests for {target_name}',
-        'Generated by adversarial_tests.py',
-        '"""',
-        '',
-        'import pytest',
-        'from fastapi.testclient import TestClient',
-        '',
-        '',
-    ]
-    
-    for test_case in test_cases:
-        code_lines.extend([
-            f'def {test_case["name"]}():',
-            f'    """',
-            f'    {test_case["description"]}',
-            f'    ',
-            f'    Exploit Type: {test_case["exploit_type"]}',
-            f'    Severity: {test_case["severity"]}',
-            f'    """',
-            f'    # TODO: Implement test',
-            f'    pytest.skip("Test skeleton - needs implementation")',
-            '',
-            '',
-        ])
-    
-    return '\n'.join(code_lines)
+    return _pytest_template().render(target_name=target_name, test_cases=test_cases)
 
 
 def main():
+    import json
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Adversarial Tests - Generate security test skeletons"
     )
@@ -244,6 +218,7 @@ def main():
         type=Path,
         help="Output directory (optional, prints to stdout if not specified)"
     )
+    add_compact_flag(parser)
     
     args = parser.parse_args()
     
@@ -273,7 +248,7 @@ def main():
         if args.format == "python":
             print(result["code"])
         else:
-            print(json.dumps(result, indent=2))
+            print(dumps(result, args.compact))
     
     sys.exit(0)
 
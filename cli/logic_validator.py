@@ -8,11 +8,21 @@ Usage:
   python cli/logic_validator.py --risk MEDIUM --files app/services/*.py
 """
 
+import re
 import sys
-import json
-import argparse
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List
+
+try:
+    from cli._output import add_compact_flag, dumps
+except ImportError:  # run as a script, with cli/ as sys.path[0]
+    from _output import add_compact_flag, dumps
+
+# A "def " line with no return annotation on the same line
+_UNTYPED_DEF_RE = re.compile(r"^[ \t]*def (?!.*->)", re.MULTILINE)
+
+# Per-file static check results, reused while (mtime, size) is unchanged
+CACHE_FILE = Path("logs/.static_checks.cache.json")
 
 
 def validate_logic(
@@ -61,12 +71,77 @@ def validate_logic(
     }
 
 
+def load_check_cache() -> Dict:
+    """Load cached static check results; a missing or corrupt cache is empty."""
+    import json
+
+    try:
+        with open(CACHE_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_check_cache(cache: Dict):
+    """Write the static check cache atomically."""
+    import json
+    import os
+
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CACHE_FILE.with_suffix(".tmp")
+    with open(tmp, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp, CACHE_FILE)
+
+
+def _check_file(fpath: Path, data: bytes) -> List[Dict]:
+    """Run the content checks for one file."""
+    issues = []
+    
+    # Check for common anti-patterns
+    if b"TODO" in data or b"FIXME" in data:
+        issues.append({
+            "file": str(fpath),
+            "severity": "WARNING",
+            "message": "Contains TODO/FIXME markers"
+        })
+    
+    # Check for type hints (Python); decode only when the regex needs text
+    if fpath.suffix == ".py":
+        if b"def " in data:
+            content = data.decode("utf-8", "replace")
+            untyped = sum(1 for _ in _UNTYPED_DEF_RE.finditer(content))
+            if untyped:
+                issues.append({
+                    "file": str(fpath),
+                    "severity": "INFO",
+                    "message": f"{untyped} functions missing return type hints"
+                })
+    
+    return issues
+
+
 def perform_static_checks(code_files: List[Path]) -> Dict:
-    """Run deterministic static analysis checks."""
+    """
+    Run deterministic static analysis checks.
+
+    Results are cached per path in CACHE_FILE and reused while the file's
+    mtime and size are unchanged, so unchanged files cost one stat.
+    """
     issues = []
+    cache = load_check_cache()
+    cache_dirty = False
     
     for fpath in code_files:
-        if not fpath.exists():
+        key = str(fpath)
+        try:
+            st = fpath.stat()
+            entry = cache.get(key)
+            if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                issues.extend(entry["issues"])
+                continue
+            data = fpath.read_bytes()
+        except FileNotFoundError:
             issues.append({
                 "file": str(fpath),
                 "severity": "ERROR",
@@ -74,27 +149,13 @@ def perform_static_checks(code_files: List[Path]) -> Dict:
             })
             continue
         
-        content = fpath.read_text()
-        
-        # Check for common anti-patterns
-        if "TODO" in content or "FIXME" in content:
-            issues.append({
-                "file": str(fpath),
-                "severity": "WARNING",
-                "message": "Contains TODO/FIXME markers"
-            })
-        
-        # Check for type hints (Python)
-        if fpath.suffix == ".py":
-            if "def " in content:
-                functions = [line for line in content.split("\n") if line.strip().startswith("def ")]
-                untyped = [f for f in functions if "->" not in f]
-                if untyped:
-                    issues.append({
-                        "file": str(fpath),
-                        "severity": "INFO",
-                        "message": f"{len(untyped)} functions missing return type hints"
-                    })
+        file_issues = _check_file(fpath, data)
+        issues.extend(file_issues)
+        cache[key] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "issues": file_issues}
+        cache_dirty = True
+    
+    if cache_dirty:
+        save_check_cache(cache)
     
     return {
         "status": "PASS" if not any(i["severity"] == "ERROR" for i in issues) else "FAIL",
@@ -104,6 +165,8 @@ def perform_static_checks(code_files: List[Path]) -> Dict:
 
 
 def main():
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Logic Validator - Validate business logic"
     )
@@ -134,6 +197,7 @@ def main():
         default=True,
         help="Output as JSON (default)"
     )
+    add_compact_flag(parser)
     
     args = parser.parse_args()
     
@@ -146,7 +210,7 @@ def main():
     
     # Output
     if args.json:
-        print(json.dumps(result, indent=2))
+        print(dumps(result, args.compact))
     else:
         print(f"Status: {result['validation_status']}")
         print(f"PRU Cost: {result['pru_cost']}")
@@ -9,27 +9,91 @@ Usage:
   python cli/pru_tracker.py --report session
 """
 
+import os
 import sys
 import csv
+import atexit
 import json
-import argparse
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    from cli._output import add_compact_flag, dumps
+except ImportError:  # run as a script, with cli/ as sys.path[0]
+    from _output import add_compact_flag, dumps
+
 
 LOG_FILE = Path("logs/pru_usage.csv")
+# Running aggregates kept next to the CSV so logging never re-reads the log
+TOTALS_FILE = Path("logs/pru_usage_totals.json")
+# Held while a log entry is appended and the totals updated
+LOCK_FILE = Path("logs/pru_usage.lock")
 LOG_FIELDS = ["date", "time", "agent", "model", "pru_cost", "context", "session_id"]
+DATE_COL = LOG_FIELDS.index("date")
+AGENT_COL = LOG_FIELDS.index("agent")
+PRU_COL = LOG_FIELDS.index("pru_cost")
+SESSION_COL = LOG_FIELDS.index("session_id")
+
+# CSV appender opened on first use and kept for the life of the process
+_LOG_FH = None
+_LOG_WRITER = None
+
+
+def _date_key(now: datetime) -> str:
+    """Format a YYYY-MM-DD date without going through strftime."""
+    return f"{now.year:04d}-{now.month:02d}-{now.day:02d}"
+
+
+def _session_key(now: datetime) -> str:
+    """Format the default hourly session id (YYYYMMDD-HH)."""
+    return f"{now.year:04d}{now.month:02d}{now.day:02d}-{now.hour:02d}"
+
+
+# Set once the log file is known to exist, so later calls skip the syscalls
+_LOG_READY = False
 
 
 def ensure_log_file():
     """Ensure log directory and file exist with headers."""
+    global _LOG_READY
+    if _LOG_READY:
+        return
+    
     LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
     
     if not LOG_FILE.exists():
         with open(LOG_FILE, 'w', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=LOG_FIELDS)
             writer.writeheader()
+    _LOG_READY = True
+
+
+def _get_writer():
+    """Return the process-wide CSV appender, opening the log on first use."""
+    global _LOG_FH, _LOG_WRITER
+    if _LOG_WRITER is None:
+        ensure_log_file()
+        _LOG_FH = open(LOG_FILE, 'a', newline='')
+        _LOG_WRITER = csv.writer(_LOG_FH)
+        atexit.register(_LOG_FH.close)
+    return _LOG_WRITER
+
+
+@contextmanager
+def _log_lock():
+    """Serialize log appends and totals updates across concurrent processes."""
+    LOCK_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(LOCK_FILE, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield  # released when the file is closed
 
 
 def log_usage(
@@ -48,22 +112,26 @@ def log_usage(
     
     now = datetime.now()
     entry = {
-        "date": now.strftime("%Y-%m-%d"),
-        "time": now.strftime("%H:%M:%S"),
+        "date": _date_key(now),
+        "time": f"{now.hour:02d}:{now.minute:02d}:{now.second:02d}",
         "agent": agent,
         "model": model,
         "pru_cost": pru_cost,
         "context": context,
-        "session_id": session_id or now.strftime("%Y%m%d-%H")
+        "session_id": session_id or _session_key(now)
     }
     
-    # Append to CSV
-    with open(LOG_FILE, 'a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=LOG_FIELDS)
-        writer.writerow(entry)
-    
-    # Calculate running total
-    total = calculate_total()
+    with _log_lock():
+        totals = load_totals()
+        
+        # Append to CSV; flushed so reports in this process see the row
+        _get_writer().writerow([entry[field] for field in LOG_FIELDS])
+        _LOG_FH.flush()
+        
+        # Update running totals
+        add_to_totals(totals, entry["date"], entry["session_id"], entry["agent"], pru_cost)
+        save_totals(totals)
+    total = summarize_totals(totals, session_id=entry["session_id"], date=entry["date"])
     
     return {
         "status": "logged",
@@ -75,38 +143,96 @@ def log_usage(
     }
 
 
-def calculate_total(session_id: Optional[str] = None, date: Optional[str] = None) -> Dict:
-    """Calculate PRU totals from log file."""
+def calculate_total(
+    session_id: Optional[str] = None,
+    date: Optional[str] = None,
+    *,
+    now: Optional[datetime] = None
+) -> Dict:
+    """Calculate PRU totals from the running totals file."""
     if not LOG_FILE.exists():
         return {"session": 0, "daily": 0, "all_time": 0}
     
-    now = datetime.now()
-    today = now.strftime("%Y-%m-%d")
-    current_session = session_id or now.strftime("%Y%m%d-%H")
-    
-    session_total = 0
-    daily_total = 0
-    all_time_total = 0
-    
-    with open(LOG_FILE, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            pru = int(row["pru_cost"])
-            all_time_total += pru
-            
-            if row["date"] == today:
-                daily_total += pru
-            
-            if row["session_id"] == current_session:
-                session_total += pru
+    return summarize_totals(load_totals(), session_id=session_id, date=date, now=now)
+
+
+def summarize_totals(
+    totals: Dict,
+    session_id: Optional[str] = None,
+    date: Optional[str] = None,
+    *,
+    now: Optional[datetime] = None
+) -> Dict:
+    """
+    Pick the session, daily and all-time PRU totals out of the aggregates.
+    
+    Callers that already read the clock pass `now` so the session and day
+    are resolved against the same instant.
+    """
+    now = now or datetime.now()
+    today = date or _date_key(now)
+    current_session = session_id or _session_key(now)
     
     return {
-        "session": session_total,
-        "daily": daily_total,
-        "all_time": all_time_total
+        "session": totals["by_session"].get(current_session, 0),
+        "daily": totals["by_day"].get(today, 0),
+        "all_time": totals["all_time"]
     }
 
 
+def _totals_current() -> bool:
+    """Whether the totals file exists and was written after the last log append."""
+    try:
+        totals_mtime = TOTALS_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+    try:
+        return totals_mtime >= LOG_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return True
+
+
+def load_totals() -> Dict:
+    """
+    Load the running PRU aggregates.
+    
+    The CSV is the source of truth: the aggregates are rebuilt with one pass
+    over it if the totals file is missing or older than the log.
+    """
+    if _totals_current():
+        with open(TOTALS_FILE, 'r') as f:
+            return json.load(f)
+    
+    totals = {"all_time": 0, "by_day": {}, "by_session": {}, "by_agent": {}}
+    if LOG_FILE.exists():
+        with open(LOG_FILE, 'r', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)  # header
+            for row in reader:
+                add_to_totals(totals, row[DATE_COL], row[SESSION_COL], row[AGENT_COL], int(row[PRU_COL]))
+        save_totals(totals)
+    return totals
+
+
+def add_to_totals(totals: Dict, date: str, session_id: str, agent_name: str, pru: int):
+    """Add one log entry to the running aggregates."""
+    totals["all_time"] += pru
+    totals["by_day"][date] = totals["by_day"].get(date, 0) + pru
+    totals["by_session"][session_id] = totals["by_session"].get(session_id, 0) + pru
+    
+    agent = totals["by_agent"].setdefault(agent_name, {"count": 0, "total_pru": 0})
+    agent["count"] += 1
+    agent["total_pru"] += pru
+
+
+def save_totals(totals: Dict):
+    """Write the running aggregates atomically."""
+    tmp_file = TOTALS_FILE.with_suffix(f".json.{os.getpid()}.tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump(totals, f)
+    os.replace(tmp_file, TOTALS_FILE)
+
+
 def check_budget_status(totals: Dict) -> str:
     """Check if usage is within budget limits."""
     SESSION_LIMIT = 100
@@ -130,36 +256,36 @@ def generate_report(period: str = "today") -> Dict:
         }
     
     now = datetime.now()
-    today = now.strftime("%Y-%m-%d")
-    current_session = now.strftime("%Y%m%d-%H")
-    
-    entries = []
-    with open(LOG_FILE, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if period == "today" and row["date"] == today:
-                entries.append(row)
-            elif period == "session" and row["session_id"] == current_session:
-                entries.append(row)
-            elif period == "all":
-                entries.append(row)
-    
-    # Aggregate by agent
-    agent_totals = {}
-    for entry in entries:
-        agent = entry["agent"]
-        pru = int(entry["pru_cost"])
-        if agent not in agent_totals:
-            agent_totals[agent] = {"count": 0, "total_pru": 0}
-        agent_totals[agent]["count"] += 1
-        agent_totals[agent]["total_pru"] += pru
-    
-    totals = calculate_total()
+    today = _date_key(now)
+    current_session = _session_key(now)
+    all_totals = load_totals()
+    
+    if period == "all":
+        # All-time per-agent aggregates are kept up to date by log_usage
+        agent_totals = all_totals["by_agent"]
+        entries_count = sum(agent["count"] for agent in agent_totals.values())
+    else:
+        # Single pass, aggregating by agent as rows are read
+        agent_totals = {}
+        entries_count = 0
+        match_col, match_value = (DATE_COL, today) if period == "today" else (SESSION_COL, current_session)
+        with open(LOG_FILE, 'r', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)  # header
+            for row in reader:
+                if row[match_col] != match_value:
+                    continue
+                entries_count += 1
+                agent = agent_totals.setdefault(row[AGENT_COL], {"count": 0, "total_pru": 0})
+                agent["count"] += 1
+                agent["total_pru"] += int(row[PRU_COL])
+    
+    totals = summarize_totals(all_totals, now=now)
     
     return {
         "status": "success",
         "period": period,
-        "entries_count": len(entries),
+        "entries_count": entries_count,
         "totals": totals,
         "budget_status": check_budget_status(totals),
         "by_agent": agent_totals,
@@ -172,6 +298,8 @@ def generate_report(period: str = "today") -> Dict:
 
 
 def main():
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="PRU Tracker - Log and report PRU usage"
     )
@@ -195,6 +323,9 @@ def main():
         help="Report period"
     )
     
+    for subparser in (log_parser, report_parser):
+        add_compact_flag(subparser)
+    
     # Backwards compatibility: if no subcommand, treat as log
     if len(sys.argv) > 1 and sys.argv[1] not in ["log", "report", "-h", "--help"]:
         sys.argv.insert(1, "log")
@@ -203,7 +334,7 @@ def main():
     
     if args.command == "report":
         result = generate_report(args.period)
-        print(json.dumps(result, indent=2))
+        print(dumps(result, args.compact))
     elif args.command == "log":
         result = log_usage(
             agent=args.agent,
@@ -212,7 +343,7 @@ def main():
             context=args.context,
             session_id=getattr(args, 'session', None)
         )
-        print(json.dumps(result, indent=2))
+        print(dumps(result, args.compact))
     else:
         parser.print_help()
         sys.exit(1)
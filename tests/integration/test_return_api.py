@@ -2,28 +2,32 @@
 Return API integration tests.
 """
 import pytest
+from app.schemas.order import OrderCreate
+from app.services.order_service import OrderService
 from app.services.state_machine import ReturnStatus, OrderStatus
+from tests.factories import ReturnRequestFactory
 
 
 class TestReturnAPI:
     """Test return request API endpoints."""
 
     @pytest.fixture
-    def created_order(self, client, sample_order_data):
-        """Create an order for testing returns."""
-        response = client.post("/api/v1/orders", json=sample_order_data)
-        assert response.status_code == 201
-        order = response.json()
+    def created_order(self, db_session, sample_order_data):
+        """
+        Create a delivered order for testing returns.
+
+        Built through the service layer rather than five HTTP round trips;
+        the order API itself is covered by test_order_api.py.
+        """
+        service = OrderService(db_session)
+        order = service.create_order(OrderCreate.model_validate(sample_order_data))
         
         # Transition to DELIVERED (returns only allowed on delivered orders)
         transitions = [OrderStatus.PAID, OrderStatus.PROCESSING_IN_WAREHOUSE, OrderStatus.SHIPPED, OrderStatus.DELIVERED]
         for state in transitions:
-            client.patch(
-                f"/api/v1/orders/{order['id']}/state",
-                json={"new_state": state, "actor": "SYSTEM"}
-            )
+            order = service.transition_state(order.id, state, actor="SYSTEM")
         
-        return order
+        return order.model_dump(mode="json")
 
     def test_create_return(self, client, created_order):
         """Test creating a return request."""
@@ -114,18 +118,10 @@ class TestReturnAPI:
         assert data["status"] == ReturnStatus.REJECTED
         assert data["rejection_reason"] == "Outside return window"
 
-    def test_list_returns(self, client, created_order):
+    def test_list_returns(self, client, db_session, created_order):
         """Test listing returns."""
-        # Create a couple of returns
-        return_data = {
-            "order_id": created_order["id"],
-            "reason": "Test reason",
-            "requested_by": created_order["customer_id"],
-            "items": [{"line_item_id": created_order["line_items"][0]["id"], "quantity": 1}],
-            "refund_amount": "25.00",
-        }
-        client.post("/api/v1/returns", json=return_data)
-        client.post("/api/v1/returns", json=return_data)
+        # Insert a couple of returns directly; creation is covered above
+        ReturnRequestFactory.bulk_create(db_session, 2, order_id=created_order["id"])
         
         # List returns
         response = client.get("/api/v1/returns")
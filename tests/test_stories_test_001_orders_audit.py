@@ -1,20 +1,19 @@
 
 
-def make_address():
-    return {
-        "street": "123 Test St",
-        "city": "Testville",
-        "state": "TS",
-        "postal_code": "12345",
-        "country": "Testland",
-    }
+ADDRESS = {
+    "street": "123 Test St",
+    "city": "Testville",
+    "state": "TS",
+    "postal_code": "12345",
+    "country": "Testland",
+}
 
 
 def test_create_order_and_get_audit_trail(client):
     order_payload = {
         "customer_id": "TEST-CUST",
-        "shipping_address": make_address(),
-        "billing_address": make_address(),
+        "shipping_address": ADDRESS,
+        "billing_address": ADDRESS,
         "payment_method": "card",
         "line_items": [
             {"product_id": "P1", "product_name": "Test Product", "quantity": 1, "unit_price": "10.00"}
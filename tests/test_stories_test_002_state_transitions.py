@@ -1,69 +1,57 @@
-def make_address():
-    return {
-        "street": "123 Test St",
-        "city": "Testville",
-        "state": "TS",
-        "postal_code": "12345",
-        "country": "Testland",
-    }
+import pytest
+
+from app.schemas.order import OrderCreate
+from app.services.order_service import OrderService
+from app.services.state_machine import OrderStatus
+from app.utils.exceptions import InvalidStateTransitionError
+
 
+ADDRESS = {
+    "street": "123 Test St",
+    "city": "Testville",
+    "state": "TS",
+    "postal_code": "12345",
+    "country": "Testland",
+}
 
-def create_order(client):
+
+def create_order(service):
     payload = {
         "customer_id": "TRANS-CUST",
-        "shipping_address": make_address(),
-        "billing_address": make_address(),
+        "shipping_address": ADDRESS,
+        "billing_address": ADDRESS,
         "payment_method": "card",
         "line_items": [
             {"product_id": "P1", "product_name": "Test Product", "quantity": 1, "unit_price": "10.00"}
         ],
     }
-    resp = client.post("/api/v1/orders", json=payload)
-    assert resp.status_code == 201
-    return resp.json()["id"]
+    return service.create_order(OrderCreate.model_validate(payload)).id
 
 
-def test_invalid_then_valid_transitions_and_invoice_enqueued(client, monkeypatch):
-    order_id = create_order(client)
+def test_invalid_then_valid_transitions_and_invoice_enqueued(db_session, mock_generate_invoice):
+    service = OrderService(db_session)
+    order_id = create_order(service)
 
     # Invalid transition: PENDING_PAYMENT -> SHIPPED should be rejected
-    resp = client.patch(f"/api/v1/orders/{order_id}/state", json={"new_state": "SHIPPED", "actor": "TEST"})
-    assert resp.status_code == 400
-    err = resp.json()
-    assert "error" in err
-    assert err["error"]["code"] == "INVALID_STATE_TRANSITION"
-    assert "allowed_transitions" in err["error"]["details"]
+    with pytest.raises(InvalidStateTransitionError) as exc_info:
+        service.transition_state(order_id, OrderStatus.SHIPPED, actor="TEST")
+    assert exc_info.value.code == "INVALID_STATE_TRANSITION"
+    assert "allowed_transitions" in exc_info.value.details
 
     # Valid transitions
-    resp = client.patch(f"/api/v1/orders/{order_id}/state", json={"new_state": "PAID", "actor": "TEST"})
-    assert resp.status_code == 200
-    assert resp.json()["status"] == "PAID"
-
-    resp = client.patch(f"/api/v1/orders/{order_id}/state", json={"new_state": "PROCESSING_IN_WAREHOUSE", "actor": "TEST"})
-    assert resp.status_code == 200
-    assert resp.json()["status"] == "PROCESSING_IN_WAREHOUSE"
-
-    # Inject a dummy invoice_tasks module to avoid importing celery in tests
-    import sys, types
+    order = service.transition_state(order_id, OrderStatus.PAID, actor="TEST")
+    assert order.status == "PAID"
 
-    called = []
-    mod = types.ModuleType("app.tasks.invoice_tasks")
-    class DummyGen:
-        @staticmethod
-        def delay(arg):
-            called.append(arg)
-    mod.generate_invoice = DummyGen()
-    sys.modules["app.tasks.invoice_tasks"] = mod
+    order = service.transition_state(order_id, OrderStatus.PROCESSING_IN_WAREHOUSE, actor="TEST")
+    assert order.status == "PROCESSING_IN_WAREHOUSE"
 
-    resp = client.patch(f"/api/v1/orders/{order_id}/state", json={"new_state": "SHIPPED", "actor": "TEST"})
-    assert resp.status_code == 200
-    assert resp.json()["status"] == "SHIPPED"
+    # The invoice task is patched by the mock_generate_invoice fixture this test requests
+    order = service.transition_state(order_id, OrderStatus.SHIPPED, actor="TEST")
+    assert order.status == "SHIPPED"
 
     # ensure invoice task was enqueued (delay called)
-    assert called == [str(order_id)]
+    mock_generate_invoice.delay.assert_called_once_with(str(order_id))
 
     # audit trail contains SHIPPED
-    resp = client.get(f"/api/v1/orders/{order_id}/audit")
-    assert resp.status_code == 200
-    history = resp.json()["history"]
-    assert any(h["new_state"] == "SHIPPED" for h in history)
+    history = service.get_state_history(order_id)
+    assert any(h.new_state == "SHIPPED" for h in history)
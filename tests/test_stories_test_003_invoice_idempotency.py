@@ -1,59 +1,55 @@
-def make_address():
-    return {
-        "street": "123 Test St",
-        "city": "Testville",
-        "state": "TS",
-        "postal_code": "12345",
-        "country": "Testland",
-    }
+from app.schemas.order import OrderCreate
+from app.services.order_service import OrderService
+from app.services.state_machine import OrderStatus
+
+
+ADDRESS = {
+    "street": "123 Test St",
+    "city": "Testville",
+    "state": "TS",
+    "postal_code": "12345",
+    "country": "Testland",
+}
 
 
-def test_invoice_enqueued_and_idempotent(client):
+def test_invoice_enqueued_and_idempotent(db_session, mock_generate_invoice):
     # Create order
     payload = {
         "customer_id": "INV-CUST",
-        "shipping_address": make_address(),
-        "billing_address": make_address(),
+        "shipping_address": ADDRESS,
+        "billing_address": ADDRESS,
         "payment_method": "card",
         "line_items": [
             {"product_id": "P1", "product_name": "Test Product", "quantity": 1, "unit_price": "10.00"}
         ],
     }
-    resp = client.post("/api/v1/orders", json=payload)
-    assert resp.status_code == 201
-    order_id = resp.json()["id"]
-
-    # Prepare a dummy invoice task module that is idempotent
-    import sys, types
-
+    service = OrderService(db_session)
+    order_id = service.create_order(OrderCreate.model_validate(payload)).id
 
+    # Idempotent stand-in for the invoice task's side effect
     INVOICE_STORE = {}
-    mod = types.ModuleType("app.tasks.invoice_tasks")
-    class DummyGen:
-        @staticmethod
-        def delay(order_id_arg):
-            order_id_str = str(order_id_arg)
-            # simulate idempotent invoice generation
-            if INVOICE_STORE.get(order_id_str):
-                return {"status": "already_exists"}
-            INVOICE_STORE[order_id_str] = f"/invoices/{order_id_str}.pdf"
-            return {"status": "created", "path": INVOICE_STORE[order_id_str]}
-    mod.generate_invoice = DummyGen()
-    sys.modules["app.tasks.invoice_tasks"] = mod
+    def fake_delay(order_id_arg):
+        order_id_str = str(order_id_arg)
+        # simulate idempotent invoice generation
+        if INVOICE_STORE.get(order_id_str):
+            return {"status": "already_exists"}
+        INVOICE_STORE[order_id_str] = f"/invoices/{order_id_str}.pdf"
+        return {"status": "created", "path": INVOICE_STORE[order_id_str]}
+
+    mock_generate_invoice.delay.side_effect = fake_delay
 
     # Transition order to PAID -> PROCESSING_IN_WAREHOUSE -> SHIPPED
-    resp = client.patch(f"/api/v1/orders/{order_id}/state", json={"new_state": "PAID", "actor": "TEST"})
-    assert resp.status_code == 200
-    resp = client.patch(f"/api/v1/orders/{order_id}/state", json={"new_state": "PROCESSING_IN_WAREHOUSE", "actor": "TEST"})
-    assert resp.status_code == 200
+    service.transition_state(order_id, OrderStatus.PAID, actor="TEST")
+    service.transition_state(order_id, OrderStatus.PROCESSING_IN_WAREHOUSE, actor="TEST")
 
     # First transition to SHIPPED should enqueue/create invoice
-    resp = client.patch(f"/api/v1/orders/{order_id}/state", json={"new_state": "SHIPPED", "actor": "TEST"})
-    assert resp.status_code == 200
+    order = service.transition_state(order_id, OrderStatus.SHIPPED, actor="TEST")
+    assert order.status == "SHIPPED"
+    mock_generate_invoice.delay.assert_called_once_with(str(order_id))
 
     # Simulate duplicate task execution (retry) by calling delay again
-    res2 = mod.generate_invoice.delay(str(order_id))
-    assert res2["status"] in ("already_exists", "created")
+    res2 = mock_generate_invoice.delay(str(order_id))
+    assert res2["status"] == "already_exists"
 
     # Ensure only one invoice entry exists
     assert len(INVOICE_STORE) == 1
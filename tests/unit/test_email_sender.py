@@ -0,0 +1,102 @@
+"""
+Unit tests for EmailSender's persistent SMTP connection.
+"""
+
+import smtplib
+import threading
+import pytest
+from email.message import EmailMessage
+from unittest.mock import MagicMock
+from app.utils import email_sender
+from app.utils.email_sender import EmailSender, close_smtp_connection
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """Make EmailSender._connect hand out (and record) mock SMTP connections."""
+    opened = []
+
+    def connect(self):
+        conn = MagicMock()
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(EmailSender, "_connect", connect)
+    yield opened
+    close_smtp_connection()
+
+@pytest.mark.parametrize("error", [
+    smtplib.SMTPServerDisconnected("gone"),
+    smtplib.SMTPResponseException(421, b"idle timeout"),
+    ConnectionResetError("reset by peer"),
+])
+def test_reconnects_on_connection_error(connections, error):
+    sender = EmailSender()
+    sender._send_persistent(EmailMessage())
+    connections[0].send_message.side_effect = error
+
+    sender._send_persistent(EmailMessage())
+
+    assert len(connections) == 2
+    connections[0].quit.assert_called_once()
+    connections[1].send_message.assert_called_once()
+
+def test_protocol_error_does_not_reconnect(connections):
+    sender = EmailSender()
+    sender._send_persistent(EmailMessage())
+    connections[0].send_message.side_effect = smtplib.SMTPRecipientsRefused({})
+
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        sender._send_persistent(EmailMessage())
+
+    assert len(connections) == 1
+
+def test_connection_is_per_thread(connections):
+    sender = EmailSender()
+    sender._send_persistent(EmailMessage())
+
+    def send_and_close():
+        sender._send_persistent(EmailMessage())
+        close_smtp_connection()
+
+    thread = threading.Thread(target=send_and_close)
+    thread.start()
+    thread.join()
+    sender._send_persistent(EmailMessage())
+
+    assert len(connections) == 2
+    assert connections[0].send_message.call_count == 2
+    assert email_sender._smtp_local.conn is connections[0]
+
+def _invoice_job(order_id):
+    email = {"order_id": order_id, "to": f"c{order_id}@example.com", "tracking": None, "carrier": None}
+    return email, f"/tmp/invoice_{order_id}.pdf"
+
+def test_send_invoices_maps_failures_back_to_jobs(monkeypatch):
+    """Failed messages and whole failed sessions come back as their (email, path) jobs."""
+    monkeypatch.setattr("app.utils.email_sender.settings.SMTP_MAX_CONNECTIONS", 3)
+    sessions = []
+
+    async def send_session(self, messages):
+        sessions.append(messages)
+        if any(message[0] == "c2@example.com" for message in messages):
+            raise ConnectionResetError("session dropped")
+        return [message for message in messages if message[0] == "c4@example.com"]
+
+    monkeypatch.setattr(EmailSender, "_send_session_async", send_session)
+    jobs = [_invoice_job(order_id) for order_id in range(1, 8)]
+
+    failed = EmailSender().send_invoices(jobs)
+
+    # Round-robin over 3 sessions: (1, 4, 7), (2, 5), (3, 6)
+    assert [[message[0] for message in shard] for shard in sessions] == [
+        ["c1@example.com", "c4@example.com", "c7@example.com"],
+        ["c2@example.com", "c5@example.com"],
+        ["c3@example.com", "c6@example.com"],
+    ]
+    assert sorted(failed, key=lambda job: job[0]["order_id"]) == [
+        _invoice_job(2), _invoice_job(4), _invoice_job(5),
+    ]
+
+def test_send_invoices_without_jobs():
+    assert EmailSender().send_invoices([]) == []
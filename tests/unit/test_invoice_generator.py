@@ -0,0 +1,60 @@
+"""
+Unit tests for batch invoice rendering with a fake WeasyPrint.
+"""
+
+import re
+import sys
+import types
+import pytest
+from datetime import datetime
+from app.utils.invoice_generator import InvoiceGenerator
+from tests.factories import OrderFactory
+
+
+class _FakeDocument:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def copy(self, pages):
+        return _FakeDocument(pages)
+
+    def write_pdf(self):
+        return "|".join(page.label for page in self.pages).encode()
+
+
+class _FakeHTML:
+    """Lays out each rendered order section as two pages; only the first carries its anchor."""
+
+    def __init__(self, string):
+        self.string = string
+
+    def render(self, font_config=None):
+        pages = []
+        for anchor in re.findall(r'<section id="(order-\d+)"', self.string):
+            pages.append(types.SimpleNamespace(anchors={anchor: (0, 0)}, label=f"{anchor}/1"))
+            pages.append(types.SimpleNamespace(anchors={}, label=f"{anchor}/2"))
+        return _FakeDocument(pages)
+
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "weasyprint", types.SimpleNamespace(HTML=_FakeHTML))
+    monkeypatch.setattr(InvoiceGenerator, "_font_config", object())
+    monkeypatch.setattr("app.utils.invoice_generator.settings.STORAGE_PATH", str(tmp_path))
+    return InvoiceGenerator()
+
+def test_generate_many_splits_pages_per_order(generator):
+    orders = [
+        OrderFactory.build(id=order_id, created_at=datetime(2026, 1, 1), line_items=[])
+        for order_id in (7, 42, 108)
+    ]
+
+    paths = generator.generate_many(orders)
+
+    assert set(paths) == {7, 42, 108}
+    for order_id, path in paths.items():
+        with open(path, "rb") as f:
+            assert f.read() == f"order-{order_id}/1|order-{order_id}/2".encode()
+
+def test_generate_many_without_orders(generator):
+    assert generator.generate_many([]) == {}
@@ -0,0 +1,36 @@
+"""
+Unit tests for invoice task helpers.
+"""
+
+import logging
+import pytest
+from unittest.mock import MagicMock
+from app.tasks import invoice_tasks
+
+EMAIL = {"order_id": 1, "to": "customer@example.com", "tracking": None, "carrier": None}
+
+
+@pytest.fixture
+def failing_sender(monkeypatch):
+    sender = MagicMock()
+    sender.return_value.send_invoice.side_effect = OSError("smtp down")
+    monkeypatch.setattr(invoice_tasks, "EmailSender", sender)
+    return sender
+
+def test_inline_email_failure_queues_send(failing_sender, monkeypatch):
+    queued = MagicMock()
+    monkeypatch.setattr(invoice_tasks, "send_invoice_email", queued)
+
+    invoice_tasks._send_invoice_email_inline(EMAIL, "/tmp/invoice.pdf")
+
+    queued.delay.assert_called_once_with(EMAIL, "/tmp/invoice.pdf")
+
+def test_inline_email_and_queue_failure_is_logged_not_raised(failing_sender, monkeypatch, caplog):
+    queued = MagicMock()
+    queued.delay.side_effect = ConnectionError("broker down")
+    monkeypatch.setattr(invoice_tasks, "send_invoice_email", queued)
+
+    with caplog.at_level(logging.ERROR, logger=invoice_tasks.__name__):
+        invoice_tasks._send_invoice_email_inline(EMAIL, "/tmp/invoice.pdf")
+
+    assert "Could not queue invoice email for order 1" in caplog.text
@@ -4,34 +4,36 @@ Unit tests for OrderService: state transitions, audit, and invoice trigger.
 
 import pytest
 from unittest.mock import MagicMock
+from datetime import datetime, timedelta
 from decimal import Decimal
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, clear_mappers
 from app.models.order import Order
 from app.models.state_history import StateHistory
-from app.services.order_service import OrderService
+from app.services.order_service import OrderService, _to_response
 from app.services.state_machine import OrderStatus
 from app.utils.exceptions import InvalidStateTransitionError
 from tests.factories import OrderFactory
-from app.database import Base
-
-
-# Use a real in-memory SQLite DB for stateful tests
-@pytest.fixture(scope="function")
-def db_session():
-    engine = create_engine("sqlite:///:memory:")
-    Base.metadata.create_all(engine)
-    SessionLocal = sessionmaker(bind=engine)
-    session = SessionLocal()
-    try:
-        yield session
-    finally:
-        session.close()
-        Base.metadata.drop_all(engine)
+
+
+@pytest.fixture(scope="session")
+def _order_service():
+    return OrderService(None)
+
+@pytest.fixture
+def order_service(_order_service, db_session):
+    """The shared OrderService, pointed at this test's session."""
+    _order_service.db = db_session
+    _order_service.audit_service.db = db_session
+    return _order_service
+
+# One mock shared by every test, reset instead of rebuilt
+_AUDIT_MOCK = MagicMock()
 
 @pytest.fixture
-def order_service(db_session):
-    return OrderService(db_session)
+def audit_mock(order_service, monkeypatch):
+    """Stand-in for audit_service.record_state_change, reset per test."""
+    _AUDIT_MOCK.reset_mock()
+    monkeypatch.setattr(order_service.audit_service, "record_state_change", _AUDIT_MOCK)
+    return _AUDIT_MOCK
 
 @pytest.mark.parametrize("current,new,should_succeed", [
     (OrderStatus.PENDING_PAYMENT, OrderStatus.PAID, True),
@@ -43,16 +45,12 @@ def order_service(db_session):
     (OrderStatus.SHIPPED, OrderStatus.PAID, False),
     (OrderStatus.DELIVERED, OrderStatus.CANCELLED, False),
 ])
-def test_order_state_transition(order_service, db_session, current, new, should_succeed):
-    order = OrderFactory.build(status=current)
-    db_session.add(order)
-    db_session.commit()
-    # Patch audit_service to avoid real DB writes for audit
-    order_service.audit_service.record_state_change = MagicMock()
+def test_order_state_transition(order_service, audit_mock, db_session, current, new, should_succeed):
+    order_id = OrderFactory.insert(db_session, status=current)
 
     if should_succeed:
         result = order_service.transition_state(
-            order_id=order.id,
+            order_id=order_id,
             new_state=new,
             actor="user-1",
             trigger="API_CALL",
@@ -60,50 +58,117 @@ def test_order_state_transition(order_service, db_session, current, new, should_
             ip_address="127.0.0.1"
         )
         assert result.status == new
-        order_service.audit_service.record_state_change.assert_called_once()
+        audit_mock.assert_called_once()
     else:
         with pytest.raises(InvalidStateTransitionError):
             order_service.transition_state(
-                order_id=order.id,
+                order_id=order_id,
                 new_state=new,
                 actor="user-1",
                 trigger="API_CALL",
                 metadata={},
                 ip_address="127.0.0.1"
             )
-        order_service.audit_service.record_state_change.assert_not_called()
+        audit_mock.assert_not_called()
 
-def test_invoice_trigger_on_shipped(order_service, db_session):
-    order = OrderFactory.build(status=OrderStatus.PROCESSING_IN_WAREHOUSE)
+def test_trusted_construct_matches_validation(order_service, db_session, monkeypatch):
+    order = OrderFactory.build(extra_metadata={"gift": True})
     db_session.add(order)
     db_session.commit()
-    order_service.audit_service.record_state_change = MagicMock()
-    # Patch Celery task using unittest.mock.patch
-    import sys, types
-    from unittest.mock import patch
-    # Inject dummy invoice_tasks module if not present
-    try:
-        import app.tasks.invoice_tasks
-        import app.tasks
-        sys.modules["app.tasks"].invoice_tasks = sys.modules["app.tasks.invoice_tasks"]
-    except ImportError:
-        # fallback for test envs without celery
-        mod = types.ModuleType("app.tasks.invoice_tasks")
-        class DummyGen:
-            @staticmethod
-            def delay(order_id):
-                return None
-        mod.generate_invoice = DummyGen()
-        sys.modules["app.tasks.invoice_tasks"] = mod
-        import app.tasks
-        sys.modules["app.tasks"].invoice_tasks = mod
-    with patch("app.tasks.invoice_tasks.generate_invoice") as mock_generate_invoice:
-        order_service.transition_state(
-            order_id=order.id,
-            new_state=OrderStatus.SHIPPED,
-            actor="user-1",
-            trigger="API_CALL",
-            metadata={},
-            ip_address="127.0.0.1"
-        )
-        mock_generate_invoice.delay.assert_called_once_with(str(order.id))
+
+    constructed = _to_response(order)
+    monkeypatch.setattr("app.services.order_service.settings.TRUSTED_MODEL_CONSTRUCT", False)
+    validated = _to_response(order)
+
+    assert constructed.model_dump() == validated.model_dump()
+    assert constructed.extra_metadata == {"gift": True}
+
+def test_invoice_trigger_on_shipped(order_service, audit_mock, db_session, mock_generate_invoice):
+    order_id = OrderFactory.insert(db_session, status=OrderStatus.PROCESSING_IN_WAREHOUSE)
+    order_service.transition_state(
+        order_id=order_id,
+        new_state=OrderStatus.SHIPPED,
+        actor="user-1",
+        trigger="API_CALL",
+        metadata={},
+        ip_address="127.0.0.1"
+    )
+    mock_generate_invoice.delay.assert_called_once_with(str(order_id))
+
+def test_audit_timestamp_is_utc(order_service, db_session):
+    order_id = OrderFactory.insert(db_session, status=OrderStatus.PENDING_PAYMENT)
+    before = datetime.utcnow() - timedelta(milliseconds=1)
+    order_service.transition_state(order_id=order_id, new_state=OrderStatus.PAID, actor="user-1")
+    after = datetime.utcnow()
+
+    entry = db_session.query(StateHistory).filter_by(order_id=order_id).one()
+
+    assert before <= entry.timestamp <= after + timedelta(milliseconds=1)
+
+def test_transition_state_bulk(order_service, db_session):
+    orders = [OrderFactory.build(status=OrderStatus.PAID) for _ in range(3)]
+    db_session.add_all(orders)
+    db_session.commit()
+    order_ids = [o.id for o in orders]
+
+    count = order_service.transition_state_bulk(
+        order_ids, OrderStatus.PROCESSING_IN_WAREHOUSE, actor="admin-1"
+    )
+
+    assert count == 3
+    db_session.expire_all()
+    assert {o.status for o in orders} == {OrderStatus.PROCESSING_IN_WAREHOUSE}
+    history = db_session.query(StateHistory).filter(StateHistory.order_id.in_(order_ids)).all()
+    assert len(history) == 3
+    assert {h.previous_state for h in history} == {OrderStatus.PAID.value}
+
+def test_transition_state_bulk_rejects_whole_batch(order_service, db_session):
+    paid = OrderFactory.build(status=OrderStatus.PAID)
+    delivered = OrderFactory.build(status=OrderStatus.DELIVERED)
+    db_session.add_all([paid, delivered])
+    db_session.commit()
+
+    with pytest.raises(InvalidStateTransitionError):
+        order_service.transition_state_bulk([paid.id, delivered.id], OrderStatus.CANCELLED)
+
+    db_session.expire_all()
+    assert paid.status == OrderStatus.PAID
+    assert db_session.query(StateHistory).count() == 0
+
+def test_transition_state_bulk_dedupes_and_skips_current_state(order_service, db_session):
+    paid = OrderFactory.build(status=OrderStatus.PAID)
+    processing = OrderFactory.build(status=OrderStatus.PROCESSING_IN_WAREHOUSE)
+    db_session.add_all([paid, processing])
+    db_session.commit()
+
+    count = order_service.transition_state_bulk(
+        [paid.id, paid.id, processing.id], OrderStatus.PROCESSING_IN_WAREHOUSE
+    )
+
+    assert count == 1
+    history = db_session.query(StateHistory).all()
+    assert [(h.order_id, h.previous_state) for h in history] == [(paid.id, OrderStatus.PAID.value)]
+
+def test_transition_state_bulk_shipped_dispatches_invoice_batch(order_service, db_session, monkeypatch):
+    batch_task = MagicMock()
+    monkeypatch.setattr("app.services.order_service.generate_invoices_batch", batch_task)
+    order_ids = [
+        OrderFactory.insert(db_session, status=OrderStatus.PROCESSING_IN_WAREHOUSE) for _ in range(2)
+    ]
+
+    order_service.transition_state_bulk(order_ids, OrderStatus.SHIPPED)
+
+    batch_task.delay.assert_called_once_with(order_ids)
+
+def test_transition_to_current_state_is_noop(order_service, audit_mock, db_session):
+    order_id = OrderFactory.insert(db_session, status=OrderStatus.PAID)
+
+    result = order_service.transition_state(order_id=order_id, new_state=OrderStatus.PAID, actor="user-1")
+
+    assert result.status == OrderStatus.PAID
+    audit_mock.assert_not_called()
+
+    order_service.transition_state(
+        order_id=order_id, new_state=OrderStatus.PAID, actor="user-1", record_noop=True
+    )
+    audit_mock.assert_called_once()
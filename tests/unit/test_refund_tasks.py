@@ -0,0 +1,53 @@
+"""
+Unit tests for the refund task body (eager short-circuit disabled).
+"""
+
+import pytest
+from unittest.mock import MagicMock
+from app.models.return_request import ReturnRequest
+from app.services.state_machine import ReturnStatus
+from app.tasks import refund_tasks
+from app.tasks.base import DatabaseTask
+from app.tasks.celery_app import celery_app
+from tests.factories import ReturnRequestFactory
+
+
+@pytest.fixture
+def refund_email(db_session, monkeypatch):
+    """Run process_refund for real against db_session; return the email task mock."""
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", False)
+    monkeypatch.setattr(DatabaseTask, "db", property(lambda self: db_session))
+    email_task = MagicMock()
+    monkeypatch.setattr(refund_tasks, "send_refund_email", email_task)
+    return email_task
+
+def test_process_refund_records_transaction(db_session, refund_email):
+    return_request = ReturnRequestFactory.build(
+        status=ReturnStatus.COMPLETED, extra_metadata={"note": "kept"}
+    )
+    db_session.add(return_request)
+    db_session.commit()
+
+    refund_tasks.process_refund.run(return_request.id)
+
+    db_session.expire_all()
+    stored = db_session.get(ReturnRequest, return_request.id)
+    assert stored.refund_transaction_id.startswith(f"REFUND-{return_request.id}-")
+    assert stored.extra_metadata == {
+        "note": "kept",
+        "refund_processed": True,
+        "refund_transaction_id": stored.refund_transaction_id,
+    }
+    refund_email.delay.assert_called_once()
+    assert refund_email.delay.call_args.args[1] == stored.refund_transaction_id
+
+def test_process_refund_is_idempotent(db_session, refund_email):
+    return_request = ReturnRequestFactory.build(
+        status=ReturnStatus.COMPLETED, refund_transaction_id="REFUND-existing"
+    )
+    db_session.add(return_request)
+    db_session.commit()
+
+    refund_tasks.process_refund.run(return_request.id)
+
+    refund_email.delay.assert_not_called()
@@ -7,51 +7,50 @@ import pytest
 from app.services.state_machine import StateMachine, OrderStatus, ReturnStatus
 from app.utils.exceptions import InvalidStateTransitionError
 
+# Expected transition graphs, written out independently of the app's tables
+VALID_ORDER_PAIRS = [
+    (OrderStatus.PENDING_PAYMENT, OrderStatus.PAID),
+    (OrderStatus.PENDING_PAYMENT, OrderStatus.CANCELLED),
+    (OrderStatus.PAID, OrderStatus.PROCESSING_IN_WAREHOUSE),
+    (OrderStatus.PAID, OrderStatus.CANCELLED),
+    (OrderStatus.PROCESSING_IN_WAREHOUSE, OrderStatus.SHIPPED),
+    (OrderStatus.SHIPPED, OrderStatus.DELIVERED),
+]
+VALID_RETURN_PAIRS = [
+    (ReturnStatus.REQUESTED, ReturnStatus.APPROVED),
+    (ReturnStatus.REQUESTED, ReturnStatus.REJECTED),
+    (ReturnStatus.APPROVED, ReturnStatus.IN_TRANSIT),
+    (ReturnStatus.IN_TRANSIT, ReturnStatus.RECEIVED),
+    (ReturnStatus.RECEIVED, ReturnStatus.COMPLETED),
+]
+
+
+def _invalid_pairs(states, valid_pairs):
+    """All transitions between distinct states that are not in valid_pairs."""
+    valid = frozenset(valid_pairs)
+    return [(a, b) for a in states for b in states if a != b and (a, b) not in valid]
+
+
+INVALID_ORDER_PAIRS = _invalid_pairs(OrderStatus, VALID_ORDER_PAIRS)
+INVALID_RETURN_PAIRS = _invalid_pairs(ReturnStatus, VALID_RETURN_PAIRS)
+
+# State names as they appear in error messages, formatted once
+_NAMES = {state: str(state) for state in [*OrderStatus, *ReturnStatus]}
+
 
 class TestOrderStateMachine:
     """Test order state transitions."""
 
     # Valid transitions
-    @pytest.mark.parametrize("current_state,new_state", [
-        (OrderStatus.PENDING_PAYMENT, OrderStatus.PAID),
-        (OrderStatus.PENDING_PAYMENT, OrderStatus.CANCELLED),
-        (OrderStatus.PAID, OrderStatus.PROCESSING_IN_WAREHOUSE),
-        (OrderStatus.PAID, OrderStatus.CANCELLED),
-        (OrderStatus.PROCESSING_IN_WAREHOUSE, OrderStatus.SHIPPED),
-        (OrderStatus.SHIPPED, OrderStatus.DELIVERED),
-    ])
+    @pytest.mark.parametrize("current_state,new_state", VALID_ORDER_PAIRS)
     def test_valid_order_transitions(self, current_state, new_state):
         """Test that valid order transitions are allowed."""
         assert StateMachine.can_transition(current_state, new_state, is_order=True)
         # Should not raise exception
         StateMachine.validate_transition(current_state, new_state, is_order=True)
 
-    # Invalid transitions
-    @pytest.mark.parametrize("current_state,new_state", [
-        (OrderStatus.PENDING_PAYMENT, OrderStatus.PROCESSING_IN_WAREHOUSE),
-        (OrderStatus.PENDING_PAYMENT, OrderStatus.SHIPPED),
-        (OrderStatus.PENDING_PAYMENT, OrderStatus.DELIVERED),
-        (OrderStatus.PAID, OrderStatus.PENDING_PAYMENT),
-        (OrderStatus.PAID, OrderStatus.SHIPPED),
-        (OrderStatus.PAID, OrderStatus.DELIVERED),
-        (OrderStatus.PROCESSING_IN_WAREHOUSE, OrderStatus.PENDING_PAYMENT),
-        (OrderStatus.PROCESSING_IN_WAREHOUSE, OrderStatus.PAID),
-        (OrderStatus.PROCESSING_IN_WAREHOUSE, OrderStatus.DELIVERED),
-        (OrderStatus.SHIPPED, OrderStatus.PENDING_PAYMENT),
-        (OrderStatus.SHIPPED, OrderStatus.PAID),
-        (OrderStatus.SHIPPED, OrderStatus.PROCESSING_IN_WAREHOUSE),
-        (OrderStatus.SHIPPED, OrderStatus.CANCELLED),
-        (OrderStatus.DELIVERED, OrderStatus.PENDING_PAYMENT),
-        (OrderStatus.DELIVERED, OrderStatus.PAID),
-        (OrderStatus.DELIVERED, OrderStatus.PROCESSING_IN_WAREHOUSE),
-        (OrderStatus.DELIVERED, OrderStatus.SHIPPED),
-        (OrderStatus.DELIVERED, OrderStatus.CANCELLED),
-        (OrderStatus.CANCELLED, OrderStatus.PENDING_PAYMENT),
-        (OrderStatus.CANCELLED, OrderStatus.PAID),
-        (OrderStatus.CANCELLED, OrderStatus.PROCESSING_IN_WAREHOUSE),
-        (OrderStatus.CANCELLED, OrderStatus.SHIPPED),
-        (OrderStatus.CANCELLED, OrderStatus.DELIVERED),
-    ])
+    # Invalid transitions: every other pair of distinct states
+    @pytest.mark.parametrize("current_state,new_state", INVALID_ORDER_PAIRS)
     def test_invalid_order_transitions(self, current_state, new_state):
         """Test that invalid order transitions are rejected."""
         assert not StateMachine.can_transition(current_state, new_state, is_order=True)
@@ -61,8 +60,8 @@ class TestOrderStateMachine:
         # Verify error details
         error = exc_info.value
         assert error.code == "INVALID_STATE_TRANSITION"
-        assert str(current_state) in error.message
-        assert str(new_state) in error.message
+        assert _NAMES[current_state] in error.message
+        assert _NAMES[new_state] in error.message
 
     def test_get_allowed_transitions(self):
         """Test getting allowed transitions from a state."""
@@ -71,52 +70,25 @@ class TestOrderStateMachine:
         assert OrderStatus.CANCELLED in allowed
         assert len(allowed) == 2
 
+    def test_get_allowed_transitions_is_ordered(self):
+        """Allowed transitions follow enum declaration order."""
+        allowed = StateMachine.get_allowed_transitions(OrderStatus.PAID, is_order=True)
+        assert allowed == (OrderStatus.PROCESSING_IN_WAREHOUSE, OrderStatus.CANCELLED)
+
 
 class TestReturnStateMachine:
     """Test return state transitions."""
 
     # Valid transitions
-    @pytest.mark.parametrize("current_state,new_state", [
-        (ReturnStatus.REQUESTED, ReturnStatus.APPROVED),
-        (ReturnStatus.REQUESTED, ReturnStatus.REJECTED),
-        (ReturnStatus.APPROVED, ReturnStatus.IN_TRANSIT),
-        (ReturnStatus.IN_TRANSIT, ReturnStatus.RECEIVED),
-        (ReturnStatus.RECEIVED, ReturnStatus.COMPLETED),
-    ])
+    @pytest.mark.parametrize("current_state,new_state", VALID_RETURN_PAIRS)
     def test_valid_return_transitions(self, current_state, new_state):
         """Test that valid return transitions are allowed."""
         assert StateMachine.can_transition(current_state, new_state, is_order=False)
         # Should not raise exception
         StateMachine.validate_transition(current_state, new_state, is_order=False)
 
-    # Invalid transitions
-    @pytest.mark.parametrize("current_state,new_state", [
-        (ReturnStatus.REQUESTED, ReturnStatus.IN_TRANSIT),
-        (ReturnStatus.REQUESTED, ReturnStatus.RECEIVED),
-        (ReturnStatus.REQUESTED, ReturnStatus.COMPLETED),
-        (ReturnStatus.APPROVED, ReturnStatus.REQUESTED),
-        (ReturnStatus.APPROVED, ReturnStatus.REJECTED),
-        (ReturnStatus.APPROVED, ReturnStatus.RECEIVED),
-        (ReturnStatus.APPROVED, ReturnStatus.COMPLETED),
-        (ReturnStatus.REJECTED, ReturnStatus.REQUESTED),
-        (ReturnStatus.REJECTED, ReturnStatus.APPROVED),
-        (ReturnStatus.REJECTED, ReturnStatus.IN_TRANSIT),
-        (ReturnStatus.REJECTED, ReturnStatus.RECEIVED),
-        (ReturnStatus.REJECTED, ReturnStatus.COMPLETED),
-        (ReturnStatus.IN_TRANSIT, ReturnStatus.REQUESTED),
-        (ReturnStatus.IN_TRANSIT, ReturnStatus.APPROVED),
-        (ReturnStatus.IN_TRANSIT, ReturnStatus.REJECTED),
-        (ReturnStatus.IN_TRANSIT, ReturnStatus.COMPLETED),
-        (ReturnStatus.RECEIVED, ReturnStatus.REQUESTED),
-        (ReturnStatus.RECEIVED, ReturnStatus.APPROVED),
-        (ReturnStatus.RECEIVED, ReturnStatus.REJECTED),
-        (ReturnStatus.RECEIVED, ReturnStatus.IN_TRANSIT),
-        (ReturnStatus.COMPLETED, ReturnStatus.REQUESTED),
-        (ReturnStatus.COMPLETED, ReturnStatus.APPROVED),
-        (ReturnStatus.COMPLETED, ReturnStatus.REJECTED),
-        (ReturnStatus.COMPLETED, ReturnStatus.IN_TRANSIT),
-        (ReturnStatus.COMPLETED, ReturnStatus.RECEIVED),
-    ])
+    # Invalid transitions: every other pair of distinct states
+    @pytest.mark.parametrize("current_state,new_state", INVALID_RETURN_PAIRS)
     def test_invalid_return_transitions(self, current_state, new_state):
         """Test that invalid return transitions are rejected."""
         assert not StateMachine.can_transition(current_state, new_state, is_order=False)
@@ -126,8 +98,8 @@ class TestReturnStateMachine:
         # Verify error details
         error = exc_info.value
         assert error.code == "INVALID_STATE_TRANSITION"
-        assert str(current_state) in error.message
-        assert str(new_state) in error.message
+        assert _NAMES[current_state] in error.message
+        assert _NAMES[new_state] in error.message
 
     def test_get_allowed_transitions(self):
         """Test getting allowed transitions from a state."""